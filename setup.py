@@ -13,14 +13,11 @@ setup(
     long_description_content_type="text/markdown",
     python_requires='>=3.6',
     packages=find_packages(),
-    install_requires=[
-        'urllib3==1.26.16',
-        'requests==2.31.0',
-        'requests-unixsocket==0.3.0',
-    ],
+    install_requires=[],
     entry_points={
         'console_scripts': [
             'supervisor-shell-ui=supervisor_shell_ui.main:main',
+            'supervisor-shell-ui-events=supervisor_shell_ui.eventlistener:main',
         ],
     },
     license='GPL-3.0',
@@ -0,0 +1,181 @@
+"""LICENSE HEADER START
+
+supervisor-shell-ui
+
+A command-line interface clone of the built-in web interface provided by Supervisor for managing processes.
+
+Copyright (C) 2023 Ciprian Mandache <https://ciprian.51k.eu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+LICENSE HEADER STOP"""
+import queue
+import threading
+
+# Actions run as jobs on a single worker thread, one at a time, in the order
+# they were submitted. A job is a list of steps; each step is a callable
+# that returns an output line or raises, and counts as failed if it raises.
+# Jobs submitted while others are still queued or running form one batch,
+# which is what get_progress() reports on. A job's on_progress is called from
+# the worker thread whenever its progress changes, and on_done once it's done.
+# A step that takes a while can say how far along it is with set_status, and
+# stop early if is_cancel_requested by raising JobCancelled, which cancels
+# the job instead of failing the step.
+
+
+class JobCancelled(Exception):
+    pass
+
+
+jobs = []
+running_job = None
+pending_jobs = queue.Queue()
+worker = None
+lock = threading.Lock()
+
+
+def get_job(label, steps, on_done=None, on_progress=None):
+    return {
+        "label": label,
+        "steps": steps,
+        "on_done": on_done,
+        "on_progress": on_progress,
+        "done_steps": 0,
+        "failed_steps": 0,
+        "output": [],
+        "running": False,
+        "status": "",
+        "finished": False,
+        "cancel_requested": False,
+        "cancelled": False,
+    }
+
+
+def is_busy():
+    return any(not job["finished"] for job in jobs)
+
+
+def submit(label, steps, on_done=None, on_progress=None):
+    global worker
+    job = get_job(label, steps, on_done, on_progress)
+    with lock:
+        if not is_busy():
+            jobs.clear()
+
+        jobs.append(job)
+
+        if worker is None:
+            worker = threading.Thread(target=run_worker, daemon=True)
+            worker.start()
+
+    pending_jobs.put(job)
+
+    return job
+
+
+def cancel_all():
+    with lock:
+        for job in jobs:
+            if not job["finished"]:
+                job["cancel_requested"] = True
+
+
+def run_worker():
+    while True:
+        run_job(pending_jobs.get())
+
+
+def report_progress(job):
+    if job["on_progress"] is not None:
+        job["on_progress"]()
+
+
+def set_status(status):
+    # called by the running step, on the worker thread
+    job = running_job
+    if job is None:
+        return
+
+    job["status"] = status
+    report_progress(job)
+
+
+def is_cancel_requested():
+    job = running_job
+
+    return job is not None and job["cancel_requested"]
+
+
+def run_job(job):
+    global running_job
+    running_job = job
+    job["running"] = True
+    report_progress(job)
+    for step in job["steps"]:
+        # a running step can't be interrupted, so cancelling takes effect
+        # between steps
+        if job["cancel_requested"]:
+            job["cancelled"] = True
+            break
+
+        job["status"] = ""
+        try:
+            output = step()
+            if output is not None:
+                job["output"].append(output)
+        except JobCancelled as e:
+            job["cancelled"] = True
+            job["output"].append(str(e))
+            break
+        except Exception as e:
+            job["failed_steps"] += 1
+            job["output"].append(str(e))
+
+        job["done_steps"] += 1
+        report_progress(job)
+
+    job["running"] = False
+    job["status"] = ""
+    job["finished"] = True
+    running_job = None
+    report_progress(job)
+
+    if job["on_done"] is not None:
+        job["on_done"](job)
+
+
+def get_progress():
+    if len(jobs) == 0:
+        return ""
+
+    done = [job for job in jobs if job["finished"] and not job["cancelled"]]
+    failed = [job for job in done if job["failed_steps"] > 0]
+    cancelled = [job for job in jobs if job["cancelled"] or
+                 job["cancel_requested"] and not job["finished"]]
+
+    progress = f"Jobs: {len(done)} of {len(jobs)} done"
+    if len(failed) > 0:
+        progress += f", {len(failed)} failed"
+    if len(cancelled) > 0:
+        progress += f", {len(cancelled)} cancelled"
+
+    for job in jobs:
+        if job["running"]:
+            progress += f" | {job['label']}"
+            if len(job["steps"]) > 1:
+                progress += f" ({job['done_steps']} of {len(job['steps'])} steps)"
+            if job["status"] != "":
+                progress += f": {job['status']}"
+
+    return progress
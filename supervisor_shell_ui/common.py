@@ -46,6 +46,18 @@ def format_time(t):
     return t.strftime('%A %d %B %Y %H:%M:%S')
 
 
+def format_size(size):
+    if size < 1024:
+        return f"{size:.0f} B"
+
+    for unit in ["KiB", "MiB"]:
+        size /= 1024
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+
+    return f"{size / 1024:.1f} GiB"
+
+
 def get_button(label, action=lambda: None):
     return {
         "label": label,
@@ -23,8 +23,135 @@ LICENSE HEADER STOP"""
 import os
 
 SUPERVISOR_SOCK_PATH_ENV_VAR_NAME = "SUPERVISOR_SOCK_PATH"
+SUPERVISOR_SERVER_URL_ENV_VAR_NAME = "SUPERVISOR_SERVER_URL"
+SUPERVISOR_USERNAME_ENV_VAR_NAME = "SUPERVISOR_USERNAME"
+SUPERVISOR_PASSWORD_ENV_VAR_NAME = "SUPERVISOR_PASSWORD"
+RESTART_STRATEGY_ENV_VAR_NAME = "RESTART_STRATEGY"
+RESTART_BATCH_SIZE_ENV_VAR_NAME = "RESTART_BATCH_SIZE"
+RESTART_CONCURRENCY_ENV_VAR_NAME = "RESTART_CONCURRENCY"
+RESTART_BATCH_TIMEOUT_ENV_VAR_NAME = "RESTART_BATCH_TIMEOUT"
+PROCESS_INFO_CACHE_TTL_ENV_VAR_NAME = "PROCESS_INFO_CACHE_TTL"
+RPC_CONNECT_TIMEOUT_ENV_VAR_NAME = "RPC_CONNECT_TIMEOUT"
+RPC_READ_TIMEOUT_ENV_VAR_NAME = "RPC_READ_TIMEOUT"
+SUPERVISOR_ENDPOINTS_ENV_VAR_NAME = "SUPERVISOR_ENDPOINTS"
+EVENTS_SOCK_PATH_ENV_VAR_NAME = "SUPERVISOR_EVENTS_SOCK_PATH"
+AUTO_REFRESH_INTERVAL_ENV_VAR_NAME = "AUTO_REFRESH_INTERVAL"
+AUTO_REFRESH_STEADY_INTERVAL_ENV_VAR_NAME = "AUTO_REFRESH_STEADY_INTERVAL"
+TAIL_FOLLOW_INTERVAL_ENV_VAR_NAME = "TAIL_FOLLOW_INTERVAL"
+TAIL_FOLLOW_MAX_INTERVAL_ENV_VAR_NAME = "TAIL_FOLLOW_MAX_INTERVAL"
+TAIL_SCROLLBACK_SIZE_ENV_VAR_NAME = "TAIL_SCROLLBACK_SIZE"
+SHOW_RENDER_STATS_ENV_VAR_NAME = "SHOW_RENDER_STATS"
+LOG_EXPORT_DIR_ENV_VAR_NAME = "LOG_EXPORT_DIR"
+LOG_EXPORT_COMPRESS_ENV_VAR_NAME = "LOG_EXPORT_COMPRESS"
+LOG_EXPORT_CHUNK_SIZE_ENV_VAR_NAME = "LOG_EXPORT_CHUNK_SIZE"
 APP_TITLE = "Supervisor Shell UI"
 SUPERVISOR_SOCK_PATH = "/tmp/supervisor.sock"
+# the http://host:port URL of an inet_http_server; used instead of
+# SUPERVISOR_SOCK_PATH when set
+SUPERVISOR_SERVER_URL = ""
+# credentials for inet_http_servers, unless an URL carries its own
+SUPERVISOR_USERNAME = ""
+SUPERVISOR_PASSWORD = ""
+# seconds; 0 waits forever. supervisord only answers some calls, like
+# stopping a process, once they're done, so there's no read timeout by default
+RPC_CONNECT_TIMEOUT = 10.0
+RPC_READ_TIMEOUT = 0.0
+# seconds that process info fetched for one page may be shown by another
+PROCESS_INFO_CACHE_TTL = 2.0
+# how "Restart All" goes about it, see supervisor.restart_all. Batches of
+# the parallel and group strategies are capped at RESTART_CONCURRENCY
+# processes, 0 meaning no cap.
+RESTART_STRATEGY = "parallel"
+RESTART_BATCH_SIZE = 1
+RESTART_CONCURRENCY = 0
+RESTART_BATCH_TIMEOUT = 60.0
+# supervisords shown side by side in fleet mode, see transport.py for the
+# forms an endpoint can take
+SUPERVISOR_ENDPOINTS = []
+FLEET_POLL_TIMEOUT = 5.0
+EVENTS_SOCK_PATH = "/tmp/supervisor-shell-ui-events.sock"
+EVENTS_RECONNECT_INTERVAL = 5.0
+AUTO_REFRESH_INTERVAL = 1.0
+AUTO_REFRESH_STEADY_INTERVAL = 15.0
+TAIL_FOLLOW_INTERVAL = 1.0
+TAIL_FOLLOW_MAX_INTERVAL = 10.0
+# bytes of memory the Tail page may keep of a log to scroll back through
+TAIL_SCROLLBACK_SIZE = 4 * 1024 * 1024
+# shows the frame time and terminal traffic of the renderer in the title
+SHOW_RENDER_STATS = False
+# where "Export Logs" writes the logs, whether it gzips them, and the bytes
+# it reads at a time, which is about the memory an export takes
+LOG_EXPORT_DIR = "."
+LOG_EXPORT_COMPRESS = False
+LOG_EXPORT_CHUNK_SIZE = 1024 * 1024
 
 if os.getenv(SUPERVISOR_SOCK_PATH_ENV_VAR_NAME):
     SUPERVISOR_SOCK_PATH = os.getenv(SUPERVISOR_SOCK_PATH_ENV_VAR_NAME)
+
+if os.getenv(SUPERVISOR_SERVER_URL_ENV_VAR_NAME):
+    SUPERVISOR_SERVER_URL = os.getenv(SUPERVISOR_SERVER_URL_ENV_VAR_NAME)
+
+if os.getenv(SUPERVISOR_USERNAME_ENV_VAR_NAME):
+    SUPERVISOR_USERNAME = os.getenv(SUPERVISOR_USERNAME_ENV_VAR_NAME)
+
+if os.getenv(SUPERVISOR_PASSWORD_ENV_VAR_NAME):
+    SUPERVISOR_PASSWORD = os.getenv(SUPERVISOR_PASSWORD_ENV_VAR_NAME)
+
+if os.getenv(RESTART_STRATEGY_ENV_VAR_NAME):
+    RESTART_STRATEGY = os.getenv(RESTART_STRATEGY_ENV_VAR_NAME)
+
+if os.getenv(RESTART_BATCH_SIZE_ENV_VAR_NAME):
+    RESTART_BATCH_SIZE = int(os.getenv(RESTART_BATCH_SIZE_ENV_VAR_NAME))
+
+if os.getenv(RESTART_CONCURRENCY_ENV_VAR_NAME):
+    RESTART_CONCURRENCY = int(os.getenv(RESTART_CONCURRENCY_ENV_VAR_NAME))
+
+if os.getenv(RESTART_BATCH_TIMEOUT_ENV_VAR_NAME):
+    RESTART_BATCH_TIMEOUT = float(os.getenv(RESTART_BATCH_TIMEOUT_ENV_VAR_NAME))
+
+if os.getenv(PROCESS_INFO_CACHE_TTL_ENV_VAR_NAME):
+    PROCESS_INFO_CACHE_TTL = float(os.getenv(PROCESS_INFO_CACHE_TTL_ENV_VAR_NAME))
+
+if os.getenv(RPC_CONNECT_TIMEOUT_ENV_VAR_NAME):
+    RPC_CONNECT_TIMEOUT = float(os.getenv(RPC_CONNECT_TIMEOUT_ENV_VAR_NAME))
+
+if os.getenv(RPC_READ_TIMEOUT_ENV_VAR_NAME):
+    RPC_READ_TIMEOUT = float(os.getenv(RPC_READ_TIMEOUT_ENV_VAR_NAME))
+
+if os.getenv(SUPERVISOR_ENDPOINTS_ENV_VAR_NAME):
+    SUPERVISOR_ENDPOINTS = [endpoint.strip() for endpoint in os.getenv(
+        SUPERVISOR_ENDPOINTS_ENV_VAR_NAME).split(",") if endpoint.strip() != ""]
+
+if os.getenv(EVENTS_SOCK_PATH_ENV_VAR_NAME):
+    EVENTS_SOCK_PATH = os.getenv(EVENTS_SOCK_PATH_ENV_VAR_NAME)
+
+if os.getenv(AUTO_REFRESH_INTERVAL_ENV_VAR_NAME):
+    AUTO_REFRESH_INTERVAL = float(os.getenv(AUTO_REFRESH_INTERVAL_ENV_VAR_NAME))
+
+if os.getenv(AUTO_REFRESH_STEADY_INTERVAL_ENV_VAR_NAME):
+    AUTO_REFRESH_STEADY_INTERVAL = float(
+        os.getenv(AUTO_REFRESH_STEADY_INTERVAL_ENV_VAR_NAME))
+
+if os.getenv(TAIL_FOLLOW_INTERVAL_ENV_VAR_NAME):
+    TAIL_FOLLOW_INTERVAL = float(os.getenv(TAIL_FOLLOW_INTERVAL_ENV_VAR_NAME))
+
+if os.getenv(TAIL_FOLLOW_MAX_INTERVAL_ENV_VAR_NAME):
+    TAIL_FOLLOW_MAX_INTERVAL = float(
+        os.getenv(TAIL_FOLLOW_MAX_INTERVAL_ENV_VAR_NAME))
+
+if os.getenv(TAIL_SCROLLBACK_SIZE_ENV_VAR_NAME):
+    TAIL_SCROLLBACK_SIZE = int(os.getenv(TAIL_SCROLLBACK_SIZE_ENV_VAR_NAME))
+
+if os.getenv(SHOW_RENDER_STATS_ENV_VAR_NAME):
+    SHOW_RENDER_STATS = os.getenv(
+        SHOW_RENDER_STATS_ENV_VAR_NAME).lower() in ["1", "true", "yes"]
+
+if os.getenv(LOG_EXPORT_DIR_ENV_VAR_NAME):
+    LOG_EXPORT_DIR = os.getenv(LOG_EXPORT_DIR_ENV_VAR_NAME)
+
+if os.getenv(LOG_EXPORT_COMPRESS_ENV_VAR_NAME):
+    LOG_EXPORT_COMPRESS = os.getenv(
+        LOG_EXPORT_COMPRESS_ENV_VAR_NAME).lower() in ["1", "true", "yes"]
+
+if os.getenv(LOG_EXPORT_CHUNK_SIZE_ENV_VAR_NAME):
+    LOG_EXPORT_CHUNK_SIZE = int(os.getenv(LOG_EXPORT_CHUNK_SIZE_ENV_VAR_NAME))
@@ -0,0 +1,127 @@
+"""LICENSE HEADER START
+
+supervisor-shell-ui
+
+A command-line interface clone of the built-in web interface provided by Supervisor for managing processes.
+
+Copyright (C) 2023 Ciprian Mandache <https://ciprian.51k.eu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+LICENSE HEADER STOP"""
+import os
+import sys
+import json
+import socket
+import threading
+
+from supervisor_shell_ui import config
+
+# A supervisord event listener that forwards PROCESS_STATE events to
+# whoever is connected to a unix socket, one JSON object per line.
+# Add it to supervisord.conf with:
+#
+# [eventlistener:supervisor-shell-ui]
+# command=supervisor-shell-ui-events
+# events=PROCESS_STATE
+#
+# stdout is the channel to supervisord, so nothing else may be written to it.
+
+PROCESS_STATE_EVENT_PREFIX = "PROCESS_STATE_"
+
+subscribers = []
+lock = threading.Lock()
+
+
+def parse_tokens(line):
+    return dict([token.split(":", 1) for token in line.split()])
+
+
+def get_event_message(headers, payload):
+    # the first payload line holds the process details; some event types
+    # carry data after it, which isn't forwarded
+    event = parse_tokens(payload.split("\n", 1)[0])
+    event["eventname"] = headers["eventname"]
+    event["state"] = headers["eventname"][len(PROCESS_STATE_EVENT_PREFIX):]
+
+    return json.dumps(event) + "\n"
+
+
+def publish(message):
+    data = message.encode("utf-8")
+    with lock:
+        for client in list(subscribers):
+            try:
+                sent = client.send(data)
+            except OSError:
+                sent = 0
+
+            # a subscriber that can't keep up is dropped rather than
+            # holding up supervisord
+            if sent != len(data):
+                client.close()
+                subscribers.remove(client)
+
+
+def accept_subscribers(server):
+    while True:
+        client, _ = server.accept()
+        client.setblocking(False)
+        with lock:
+            subscribers.append(client)
+
+
+def serve(sock_path):
+    if os.path.exists(sock_path):
+        os.unlink(sock_path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(sock_path)
+    server.listen()
+    threading.Thread(target=accept_subscribers,
+                     args=(server,), daemon=True).start()
+
+    return server
+
+
+def run(stdin, stdout):
+    while True:
+        stdout.write(b"READY\n")
+        stdout.flush()
+
+        line = stdin.readline()
+        if not line:
+            return
+
+        headers = parse_tokens(line.decode("utf-8"))
+        payload = stdin.read(int(headers["len"])).decode("utf-8")
+        if headers["eventname"].startswith(PROCESS_STATE_EVENT_PREFIX):
+            publish(get_event_message(headers, payload))
+
+        stdout.write(b"RESULT 2\nOK")
+        stdout.flush()
+
+
+def main():
+    sock_path = config.EVENTS_SOCK_PATH
+    if len(sys.argv) > 1:
+        sock_path = sys.argv[1]
+
+    serve(sock_path)
+    print(f"forwarding process state events to {sock_path}", file=sys.stderr)
+    run(sys.stdin.buffer, sys.stdout.buffer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""LICENSE HEADER START
+
+supervisor-shell-ui
+
+A command-line interface clone of the built-in web interface provided by Supervisor for managing processes.
+
+Copyright (C) 2023 Ciprian Mandache <https://ciprian.51k.eu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+LICENSE HEADER STOP"""
+import sys
+import signal
+import asyncio
+
+loop = None
+tasks = set()
+# pages draw a frame and then wait on this until something may have changed
+# what they show: a key press, a resize of the terminal, a task finishing or
+# data arriving
+redraw_wakeup = None
+
+
+def run(coro):
+    global loop, redraw_wakeup
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    redraw_wakeup = asyncio.Event()
+    loop.add_reader(sys.stdin.fileno(), request_redraw)
+    loop.add_signal_handler(signal.SIGWINCH, request_redraw)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        # tasks still running are cancelled and given the chance to clean
+        # up, instead of being destroyed with the loop
+        for task in tasks:
+            task.cancel()
+
+        if len(tasks) > 0:
+            loop.run_until_complete(asyncio.wait(list(tasks)))
+
+        loop.remove_signal_handler(signal.SIGWINCH)
+        loop.remove_reader(sys.stdin.fileno())
+        loop.close()
+        loop = None
+        redraw_wakeup = None
+
+
+def on_task_done(task):
+    tasks.discard(task)
+    request_redraw()
+
+
+def spawn(coro):
+    task = loop.create_task(coro)
+    tasks.add(task)
+    task.add_done_callback(on_task_done)
+
+    return task
+
+
+def request_redraw():
+    if redraw_wakeup is not None:
+        redraw_wakeup.set()
+
+
+def request_redraw_threadsafe():
+    if loop is not None:
+        loop.call_soon_threadsafe(request_redraw)
+
+
+async def wait_for_redraw():
+    await redraw_wakeup.wait()
+    redraw_wakeup.clear()
+
+
+def call_soon_threadsafe(fn, *args):
+    loop.call_soon_threadsafe(fn, *args)
@@ -31,3 +31,9 @@ PAGE_DOWN = curses.KEY_NPAGE
 PAGE_UP = curses.KEY_PPAGE
 UP = curses.KEY_UP
 DOWN = curses.KEY_DOWN
+SLASH = ord("/")
+SPACE = ord(" ")
+N = ord("n")
+SHIFT_N = ord("N")
+# terminals send any of these for backspace
+BACKSPACES = [curses.KEY_BACKSPACE, 127, 8]
@@ -25,6 +25,7 @@ import curses
 import signal
 
 from supervisor_shell_ui import screen
+from supervisor_shell_ui import eventloop
 from supervisor_shell_ui import page_main
 
 
@@ -41,7 +42,7 @@ def run(stdscr):
     stdscr.timeout(0)
     screen.init(stdscr)
 
-    page_main.enter()
+    eventloop.run(page_main.enter())
 
 
 def main():
@@ -20,10 +20,13 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 LICENSE HEADER STOP"""
+import asyncio
+
 from datetime import datetime
 
 from supervisor_shell_ui import common
 from supervisor_shell_ui import config
+from supervisor_shell_ui import eventloop
 from supervisor_shell_ui import screen
 from supervisor_shell_ui import keys
 
@@ -42,6 +45,13 @@ exit = False
 last_refresh_time = datetime.now()
 selected_button = None
 buttons = {}
+# takes every key while text is being typed in, e.g. a filter; keys it
+# doesn't consume go to the keybindings
+text_input = None
+# the render stats shown in the title, renewed along with its clock since
+# drawing them would otherwise change the screen every frame
+render_stats_label = ""
+render_stats_label_time = ""
 
 
 def exit_page():
@@ -59,18 +69,40 @@ def get_default_keybindings():
         keys.PAGE_DOWN: None,
         keys.PAGE_UP: None,
         keys.UP: None,
-        keys.DOWN: None
+        keys.DOWN: None,
+        keys.SLASH: None,
+        keys.SPACE: None,
+        keys.N: None,
+        keys.SHIFT_N: None,
     }
 
 
 keybindings = get_default_keybindings()
 
 
+def mark_refreshed(clear_screen=True):
+    global last_refresh_time
+    if clear_screen:
+        screen.clear()
+
+    last_refresh_time = datetime.now()
+    eventloop.request_redraw()
+
+
 def refresh(fn):
+    # coroutine functions count as refreshed once they're done, since that's
+    # when their data arrives
+    if asyncio.iscoroutinefunction(fn):
+        async def async_wrapper(*args, **kwargs):
+            result = await fn(*args, **kwargs)
+            mark_refreshed()
+
+            return result
+
+        return async_wrapper
+
     def wrapper(*args, **kwargs):
-        global last_refresh_time
-        screen.clear()
-        last_refresh_time = datetime.now()
+        mark_refreshed()
 
         return fn(*args, **kwargs)
 
@@ -110,13 +142,30 @@ def set_keybindings(keybindings, override_reserved=False):
         set_keybinding(key, action, override_reserved)
 
 
-def handle_input():
+def set_text_input(handler):
+    global text_input
+    text_input = handler
+
+
+async def handle_input():
+    # every key typed since the last frame is handled before the next one,
+    # since the page only wakes up again for keys that come after them
     k = screen.getch()
-    if k in keybindings and keybindings[k] is not None:
-        keybindings[k]()
+    while k != -1 and not exit:
+        handled = text_input is not None and text_input(k)
+        if not handled and k in keybindings and keybindings[k] is not None:
+            result = keybindings[k]()
+            if asyncio.iscoroutine(result):
+                await result
+
+        k = screen.getch()
 
 
-def draw_keybindings_help():
+def draw_keybindings_help(extra_help=None):
+    help_items = KEYBINDINGS_HELP
+    if extra_help is not None:
+        help_items = KEYBINDINGS_HELP + extra_help
+
     lines = []
     line = ""
     max_len = 0
@@ -128,8 +177,8 @@ def draw_keybindings_help():
             max_len = line_len
 
     keybindings_help_separator_len = len(KEYBINDINGS_HELP_SEPARATOR)
-    for item in KEYBINDINGS_HELP:
-        if item != KEYBINDINGS_HELP[-1]:
+    for item in help_items:
+        if item != help_items[-1]:
             item += KEYBINDINGS_HELP_SEPARATOR
 
         if len(line) + len(item) + keybindings_help_separator_len > screen.width:
@@ -140,7 +189,7 @@ def draw_keybindings_help():
 
         line += item
 
-        if item == KEYBINDINGS_HELP[-1]:
+        if item == help_items[-1]:
             update_max_len(line)
             lines.append(line)
 
@@ -152,15 +201,29 @@ def draw_keybindings_help():
                       0, line.ljust(max_len), highlight=True)
 
 
-def draw_title(title):
-    title = f"{config.APP_TITLE} - {title} ({common.format_time(last_refresh_time)})"
-    title_x = (screen.width - len(title)) // 2
-    screen.addstr(screen.get_and_inc_current_draw_row_num(), title_x, title)
+def draw_title(title, status=""):
+    global render_stats_label, render_stats_label_time
+    refresh_time = common.format_time(last_refresh_time)
+    title = f"{config.APP_TITLE} - {title} ({refresh_time}){status}"
+    if config.SHOW_RENDER_STATS:
+        if refresh_time != render_stats_label_time:
+            render_stats_label = screen.get_render_stats_label()
+            render_stats_label_time = refresh_time
+
+        title += f" [{render_stats_label}]"
+
+    title_x = max((screen.width - len(title)) // 2, 0)
+    row = screen.get_and_inc_current_draw_row_num()
+    # the title changes length, so the row is blanked first
+    screen.add_blank_line(row)
+    screen.addstr(row, title_x, title)
 
 
 def draw_buttons(no_highlight=False):
     row = screen.get_and_inc_current_draw_row_num()
     start_pos = 0
+    # labels may change, so the row is blanked first
+    screen.add_blank_line(row)
 
     for button, props in buttons.items():
         label = props["label"]
@@ -174,6 +237,7 @@ def init(btns, selected_btn, kbindings=None, override_reserved_keybindings=False
     buttons = btns
     selected_button = selected_btn
     exit = False
+    set_text_input(None)
 
     set_keybindings(get_default_keybindings(), override_reserved=True)
     if kbindings is not None:
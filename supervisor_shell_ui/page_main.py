@@ -20,12 +20,16 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 LICENSE HEADER STOP"""
-import time
-import curses
+import asyncio
 
 from datetime import datetime
+from supervisor_shell_ui import actions
 from supervisor_shell_ui import common
+from supervisor_shell_ui import config
+from supervisor_shell_ui import eventloop
 from supervisor_shell_ui import supervisor
+from supervisor_shell_ui import supervisor_async
+from supervisor_shell_ui import transport
 from supervisor_shell_ui import keys
 from supervisor_shell_ui import screen
 from supervisor_shell_ui import page
@@ -35,29 +39,134 @@ SECTION_HEADER = 0
 SECTION_PROCESS_TABLE = 1
 
 
-@page.refresh
-def refresh():
-    update_processes()
+def refresh(cached=False):
+    # cached refreshes may show what was fetched shortly before, e.g. when
+    # coming back from another page
+    global refresh_task
+    if refresh_task is not None:
+        refresh_task.cancel()
+
+    refresh_task = run_in_background(update_processes, cached)
+
+
+def report_restart_all_progress(done_batches_num, batches_num):
+    # shows the batch being restarted in the status area, and stops the
+    # restart before the next batch when the job is cancelled
+    if actions.is_cancel_requested():
+        raise actions.JobCancelled(
+            f"Stopped restart all after batch {done_batches_num} of {batches_num}.")
+
+    actions.set_status(f"batch {done_batches_num + 1} of {batches_num}")
+
+
+def restart_all():
+    return supervisor.restart_all(restart_strategy, report_restart_all_progress)
+
+
+def get_restart_strategy_label():
+    return f"Strategy: {restart_strategy}"
+
+
+def cycle_restart_strategy():
+    global restart_strategy
+    index = -1
+    if restart_strategy in supervisor.RESTART_STRATEGIES:
+        index = supervisor.RESTART_STRATEGIES.index(restart_strategy)
+
+    restart_strategy = supervisor.RESTART_STRATEGIES[(
+        index + 1) % len(supervisor.RESTART_STRATEGIES)]
+    PAGE_BUTTONS[PAGE_BUTTON_RESTART_STRATEGY]["label"] = get_restart_strategy_label()
+
+
+def get_process_sort_label():
+    return f"Sort: {process_sort}"
+
+
+def cycle_process_sort():
+    global process_sort, process_sort_keys
+    process_sort = supervisor.PROCESS_SORTS[(supervisor.PROCESS_SORTS.index(
+        process_sort) + 1) % len(supervisor.PROCESS_SORTS)]
+    PAGE_BUTTONS[PAGE_BUTTON_SORT]["label"] = get_process_sort_label()
+
+    process_sort_keys = {key: supervisor.get_process_sort_key(process, process_sort)
+                         for key, process in process_snapshot.items()}
+    sort_processes()
+
+
+def get_log_export_progress_reporter(name, log_source):
+    # shows the throughput in the status area, and stops the export when the
+    # job is cancelled
+    def report_log_export_progress(exported_size, size, elapsed_time):
+        if actions.is_cancel_requested():
+            raise actions.JobCancelled(f"Stopped export of {name} {log_source} log.")
+
+        actions.set_status(
+            f"{log_source} {common.format_size(exported_size)} of {common.format_size(size)}, "
+            f"{common.format_size(exported_size / elapsed_time)}/s")
+
+    return report_log_export_progress
+
+
+def export_process_logs(name):
+    # runs on the worker thread, with its requests going to the process's
+    # host, which the files are named after in fleet mode
+    host = None
+    if is_fleet():
+        host = transport.get_endpoint_label(transport.get_endpoint())
+
+    output = []
+    for log_source in [supervisor.LOG_SOURCE_STDOUT, supervisor.LOG_SOURCE_STDERR]:
+        path = supervisor.get_log_export_path(name, log_source, host, config.LOG_EXPORT_COMPRESS)
+        output.append(supervisor.export_process_log(
+            name, log_source, path, config.LOG_EXPORT_COMPRESS,
+            get_log_export_progress_reporter(name, log_source)))
+
+    return "\n".join(output)
 
 
 PAGE_TITLE = "Processes"
 
 PAGE_BUTTON_REFRESH = 0
-PAGE_BUTTON_RESTART_ALL = 1
-PAGE_BUTTON_STOP_ALL = 2
+PAGE_BUTTON_SORT = 1
+PAGE_BUTTON_RESTART_ALL = 2
+PAGE_BUTTON_RESTART_STRATEGY = 3
+PAGE_BUTTON_STOP_ALL = 4
+PAGE_BUTTON_CANCEL_JOBS = 5
+
+restart_strategy = config.RESTART_STRATEGY
+process_sort = supervisor.PROCESS_SORT_NAME
 
 PAGE_BUTTONS = {
     PAGE_BUTTON_REFRESH: common.get_button("Refresh", refresh),
-    PAGE_BUTTON_RESTART_ALL: common.get_button("Restart All", supervisor.restart_all),
+    PAGE_BUTTON_SORT: common.get_button(get_process_sort_label(), cycle_process_sort),
+    PAGE_BUTTON_RESTART_ALL: common.get_button("Restart All", restart_all),
+    PAGE_BUTTON_RESTART_STRATEGY: common.get_button(
+        get_restart_strategy_label(), cycle_restart_strategy),
     PAGE_BUTTON_STOP_ALL: common.get_button("Stop All", supervisor.stop_all),
+    PAGE_BUTTON_CANCEL_JOBS: common.get_button("Cancel Jobs", actions.cancel_all),
 }
 
+# buttons whose action runs right away instead of being queued as a job
+IMMEDIATE_PAGE_BUTTONS = [
+    PAGE_BUTTON_REFRESH,
+    PAGE_BUTTON_SORT,
+    PAGE_BUTTON_RESTART_STRATEGY,
+    PAGE_BUTTON_CANCEL_JOBS,
+]
+
 PROCESS_BUTTON_START = 0
 PROCESS_BUTTON_RESTART = 1
 PROCESS_BUTTON_STOP = 2
 PROCESS_BUTTON_CLEAR_LOG = 3
 PROCESS_BUTTON_TAIL_STDOUT = 4
 PROCESS_BUTTON_TAIL_STDERR = 5
+PROCESS_BUTTON_EXPAND_GROUP = 6
+PROCESS_BUTTON_COLLAPSE_GROUP = 7
+PROCESS_BUTTON_START_GROUP = 8
+PROCESS_BUTTON_RESTART_GROUP = 9
+PROCESS_BUTTON_STOP_GROUP = 10
+PROCESS_BUTTON_TAIL_BOTH = 11
+PROCESS_BUTTON_EXPORT_LOGS = 12
 
 PROCESS_BUTTONS = {
     PROCESS_BUTTON_START: common.get_button("Start", supervisor.start_process),
@@ -66,16 +175,39 @@ PROCESS_BUTTONS = {
     PROCESS_BUTTON_CLEAR_LOG: common.get_button("Clear Log", supervisor.clear_process_log),
     PROCESS_BUTTON_TAIL_STDOUT: common.get_button("Tail Stdout"),
     PROCESS_BUTTON_TAIL_STDERR: common.get_button("Tail Stderr"),
+    PROCESS_BUTTON_EXPAND_GROUP: common.get_button("Expand"),
+    PROCESS_BUTTON_COLLAPSE_GROUP: common.get_button("Collapse"),
+    PROCESS_BUTTON_START_GROUP: common.get_button("Start", supervisor.start_process_group),
+    PROCESS_BUTTON_RESTART_GROUP: common.get_button("Restart", supervisor.restart_process_group),
+    PROCESS_BUTTON_STOP_GROUP: common.get_button("Stop", supervisor.stop_process_group),
+    PROCESS_BUTTON_TAIL_BOTH: common.get_button("Tail Both"),
+    PROCESS_BUTTON_EXPORT_LOGS: common.get_button("Export Logs", export_process_logs),
+}
+
+# the logs each tail button shows, and whether they're merged into one pane
+PROCESS_BUTTON_TAIL_LOG_SOURCES = {
+    PROCESS_BUTTON_TAIL_STDOUT: ([supervisor.LOG_SOURCE_STDOUT], False),
+    PROCESS_BUTTON_TAIL_STDERR: ([supervisor.LOG_SOURCE_STDERR], False),
+    PROCESS_BUTTON_TAIL_BOTH: ([supervisor.LOG_SOURCE_STDOUT, supervisor.LOG_SOURCE_STDERR], True),
 }
 
 PROCESS_STATE_RUNNING = "RUNNING"
 PROCESS_STATE_STARTING = "STARTING"
+PROCESS_STATE_STOPPING = "STOPPING"
 PROCESS_STATE_STOPPED = "STOPPED"
 PROCESS_STATE_BACKOFF = "BACKOFF"
 PROCESS_STATE_EXITED = "EXITED"
 PROCESS_STATE_FATAL = "FATAL"
 PROCESS_STATE_UNKNOWN = "UNKNOWN"
 
+# states that are expected to change soon, so the table is polled quickly
+# while any process is in one of them
+TRANSITIONAL_PROCESS_STATES = [
+    PROCESS_STATE_STARTING,
+    PROCESS_STATE_STOPPING,
+    PROCESS_STATE_BACKOFF,
+]
+
 PROCESS_STATE_TO_BUTTONS = {
     PROCESS_STATE_RUNNING: [
         PROCESS_BUTTON_RESTART,
@@ -83,10 +215,19 @@ PROCESS_STATE_TO_BUTTONS = {
         PROCESS_BUTTON_CLEAR_LOG,
         PROCESS_BUTTON_TAIL_STDOUT,
         PROCESS_BUTTON_TAIL_STDERR,
+        PROCESS_BUTTON_TAIL_BOTH,
+        PROCESS_BUTTON_EXPORT_LOGS,
     ],
     PROCESS_STATE_STARTING: [
         PROCESS_BUTTON_STOP,
     ],
+    PROCESS_STATE_STOPPING: [
+        PROCESS_BUTTON_CLEAR_LOG,
+        PROCESS_BUTTON_TAIL_STDOUT,
+        PROCESS_BUTTON_TAIL_STDERR,
+        PROCESS_BUTTON_TAIL_BOTH,
+        PROCESS_BUTTON_EXPORT_LOGS,
+    ],
     PROCESS_STATE_STOPPED: [
         PROCESS_BUTTON_START,
         PROCESS_BUTTON_CLEAR_LOG,
@@ -97,6 +238,8 @@ PROCESS_STATE_TO_BUTTONS = {
         PROCESS_BUTTON_CLEAR_LOG,
         PROCESS_BUTTON_TAIL_STDOUT,
         PROCESS_BUTTON_TAIL_STDERR,
+        PROCESS_BUTTON_TAIL_BOTH,
+        PROCESS_BUTTON_EXPORT_LOGS,
     ],
     PROCESS_STATE_EXITED: [
         PROCESS_BUTTON_RESTART,
@@ -104,6 +247,8 @@ PROCESS_STATE_TO_BUTTONS = {
         PROCESS_BUTTON_CLEAR_LOG,
         PROCESS_BUTTON_TAIL_STDOUT,
         PROCESS_BUTTON_TAIL_STDERR,
+        PROCESS_BUTTON_TAIL_BOTH,
+        PROCESS_BUTTON_EXPORT_LOGS,
     ],
     PROCESS_STATE_FATAL: [
         PROCESS_BUTTON_RESTART,
@@ -111,6 +256,8 @@ PROCESS_STATE_TO_BUTTONS = {
         PROCESS_BUTTON_CLEAR_LOG,
         PROCESS_BUTTON_TAIL_STDOUT,
         PROCESS_BUTTON_TAIL_STDERR,
+        PROCESS_BUTTON_TAIL_BOTH,
+        PROCESS_BUTTON_EXPORT_LOGS,
     ],
     PROCESS_STATE_UNKNOWN: [
         PROCESS_BUTTON_RESTART,
@@ -118,14 +265,20 @@ PROCESS_STATE_TO_BUTTONS = {
         PROCESS_BUTTON_CLEAR_LOG,
         PROCESS_BUTTON_TAIL_STDOUT,
         PROCESS_BUTTON_TAIL_STDERR,
+        PROCESS_BUTTON_TAIL_BOTH,
+        PROCESS_BUTTON_EXPORT_LOGS,
     ],
 }
 
 MAX_VISIBLE_PROCESS_BUTTONS_NUM = 5
 PROCESS_TABLE_COLUMN_NAMES = ["State", "Description", "Name", "Action"]
+FLEET_PROCESS_TABLE_COLUMN_NAMES = ["Host"] + PROCESS_TABLE_COLUMN_NAMES
 
 STATUS_NUM_ROWS = 5
 
+PROCESS_FILTER_HELP = ["/: Filter"]
+TAIL_MARK_HELP = ["Space: Mark for Tail"]
+
 header_num_rows = 0
 visible_processes_num = 0
 process_table_scroll_offset = 0
@@ -133,13 +286,56 @@ selected_process_buttons = {}
 selected_process_index = 0
 current_section = SECTION_HEADER
 processes = []
+process_snapshot = {}
+# the key and the lowercased name, group, state and description of every
+# process, which the filter matches against
+process_keys = []
+process_search_texts = {}
+# the sort key of every process, which is only computed again for the
+# processes that change; the processes are sorted again when one of them
+# moved
+process_sort_keys = {}
+process_order_stale = False
+process_filter = ""
+process_filter_matches = []
+# set when a process started or stopped matching the filter, so the rows
+# are filtered again once all changes are in
+process_filter_stale = False
+editing_process_filter = False
+# what the table shows: processes that aren't in a group, a row per group,
+# and the processes of the expanded groups under theirs
+process_table_rows = []
+# the key of every row, and the row of every key
+process_row_keys = []
+process_row_indexes = {}
+expanded_process_groups = set()
+# keys of the processes that are tailed side by side with the selected one
+marked_process_keys = set()
+# rows to repaint on the next draw; everything is repainted when
+# redraw_process_table is set
+dirty_process_rows = set()
+redraw_process_table = True
 last_refresh_time = datetime.now()
 last_action_output = ""
 process_table_scroll_length = 5
+refresh_task = None
+events_task = None
+auto_refresh_task = None
+auto_refresh_wakeup = None
+auto_refresh_interval = config.AUTO_REFRESH_STEADY_INTERVAL
+last_poll_time = None
+# why the hosts that didn't answer the last poll in fleet mode didn't,
+# by endpoint
+host_errors = {}
+
+
+def is_fleet():
+    return len(config.SUPERVISOR_ENDPOINTS) > 0
 
 
 def cycle_section():
     global current_section
+    mark_process_row_dirty(selected_process_index)
     section_list = [SECTION_HEADER, SECTION_PROCESS_TABLE]
     current_section = section_list[(section_list.index(
         current_section) + 1) % len(section_list)]
@@ -157,28 +353,81 @@ def get_process_button_action(button):
     return PROCESS_BUTTONS[button]["action"]
 
 
+def get_process_selected_button(index):
+    # a row is on its first button until another one is picked, and goes
+    # back to it when the picked one isn't available anymore
+    available_buttons = get_process_available_buttons(index)
+    button = selected_process_buttons.get(process_row_keys[index])
+    if button not in available_buttons:
+        return available_buttons[0]
+
+    return button
+
+
 def get_selected_process_button():
-    return selected_process_buttons[selected_process_index]
+    return get_process_selected_button(selected_process_index)
 
 
 def get_selected_process_button_label():
-    return get_process_button_label(selected_process_buttons[selected_process_index])
+    return get_process_button_label(get_selected_process_button())
 
 
 def get_selected_process_button_action():
-    return get_process_button_action(selected_process_buttons[selected_process_index])
+    return get_process_button_action(get_selected_process_button())
+
+
+def get_selected_process_row():
+    return process_table_rows[selected_process_index]
+
 
+def get_selected_process_namespec():
+    row = get_selected_process_row()
+    if supervisor.is_process_group(row):
+        return supervisor.get_group_namespec(row["group"])
 
-def get_selected_process_name():
-    return processes[selected_process_index]["name"]
+    return supervisor.get_process_namespec(row)
+
+
+def get_selected_process_endpoint():
+    return get_selected_process_row().get("endpoint")
+
+
+def get_tailed_processes():
+    # the selected process and the ones marked, in the order of the table
+    selected_key = process_row_keys[selected_process_index]
+
+    return [process_snapshot[key] for key in process_keys
+            if key == selected_key or key in marked_process_keys]
 
 
 def get_selected_process_available_buttons():
     return get_process_available_buttons(selected_process_index)
 
 
+def get_process_group_buttons(group):
+    buttons = [PROCESS_BUTTON_EXPAND_GROUP]
+    if supervisor.get_process_group_key(group) in expanded_process_groups:
+        buttons = [PROCESS_BUTTON_COLLAPSE_GROUP]
+
+    states = group["state_counts"]
+    if any(state in supervisor.STOPPED_PROCESS_STATES for state in states):
+        buttons.append(PROCESS_BUTTON_START_GROUP)
+
+    if any(state not in supervisor.STOPPED_PROCESS_STATES for state in states):
+        buttons += [PROCESS_BUTTON_RESTART_GROUP, PROCESS_BUTTON_STOP_GROUP]
+
+    return buttons
+
+
+def get_process_row_buttons(row):
+    if supervisor.is_process_group(row):
+        return get_process_group_buttons(row)
+
+    return get_process_state_buttons(row["state"])
+
+
 def get_process_available_buttons(index):
-    return get_process_state_buttons(processes[index]["state"])
+    return get_process_row_buttons(process_table_rows[index])
 
 
 def cycle_selected_process_button(direction=common.DIRECTION_RIGHT):
@@ -190,15 +439,15 @@ def cycle_selected_process_button(direction=common.DIRECTION_RIGHT):
     except:
         current_button_index = 0
 
-    selected_process_buttons[selected_process_index] = available_buttons[(
-        current_button_index + common.get_movement_subtrahend(direction)) % len(available_buttons)]
+    set_process_selected_button(selected_process_index, available_buttons[(
+        current_button_index + common.get_movement_subtrahend(direction)) % len(available_buttons)])
 
 
 def scroll_process_table_content(direction=common.DIRECTION_DOWN):
     global process_table_scroll_offset, selected_process_index
     if direction == common.DIRECTION_DOWN:
-        process_table_scroll_offset += min(process_table_scroll_length, len(
-            processes) - process_table_scroll_offset - visible_processes_num)
+        process_table_scroll_offset += max(0, min(process_table_scroll_length, len(
+            process_table_rows) - process_table_scroll_offset - visible_processes_num))
         selected_process_index = min(
             selected_process_index, process_table_scroll_offset + visible_processes_num - 1)
     elif direction == common.DIRECTION_UP:
@@ -213,78 +462,451 @@ def clear_all_lines():
         screen.addstr(i, 0, " " * (screen.width - 1))
 
 
-def reset_selected_process_buttons():
-    global selected_process_buttons
-    for i, process in enumerate(processes):
-        selected_process_buttons[i] = get_process_state_buttons(
-            process["state"])[0]
+def set_process_selected_button(index, button):
+    selected_process_buttons[process_row_keys[index]] = button
+    mark_process_row_dirty(index)
+
+
+def reset_process_selected_button(index):
+    set_process_selected_button(index, get_process_available_buttons(index)[0])
+
+
+def scroll_to_selected_process():
+    # the table doesn't scroll past its last row, and the selected row is
+    # always in view
+    global process_table_scroll_offset
+    process_table_scroll_offset = max(0, min(
+        process_table_scroll_offset, len(process_table_rows) - visible_processes_num))
+    if selected_process_index < process_table_scroll_offset:
+        process_table_scroll_offset = selected_process_index
+    elif visible_processes_num > 0 and \
+            selected_process_index >= process_table_scroll_offset + visible_processes_num:
+        process_table_scroll_offset = selected_process_index - visible_processes_num + 1
+
+
+def mark_process_row_dirty(index):
+    dirty_process_rows.add(index)
+
+
+def mark_process_table_dirty():
+    global redraw_process_table
+    redraw_process_table = True
+
+
+def is_process_table_filtered():
+    return process_filter.strip() != ""
+
+
+def get_process_search_text(process):
+    return "\n".join([process["name"], process["group"],
+                      process["state"], process["description"]]).lower()
+
+
+def filter_process_keys(keys, query):
+    # every term has to match, and each narrows the matches of the one
+    # before
+    for term in query.lower().split():
+        keys = [key for key in keys if term in process_search_texts[key]]
+
+    return keys
+
+
+def set_process_filter(query):
+    # a query that extends the last one can only match fewer processes, so
+    # only the last matches are looked at again
+    global process_filter, process_filter_matches
+    candidates = process_keys
+    if is_process_table_filtered() and query.startswith(process_filter):
+        candidates = process_filter_matches
+
+    process_filter = query
+    process_filter_matches = []
+    if is_process_table_filtered():
+        process_filter_matches = filter_process_keys(candidates, query)
+
+    update_process_table()
+
+
+def refilter_processes():
+    global process_filter_stale, process_filter_matches
+    process_filter_stale = False
+    if is_process_table_filtered():
+        process_filter_matches = filter_process_keys(process_keys, process_filter)
+
+    update_process_table()
+
+
+def sort_processes():
+    global processes, process_keys, process_order_stale
+    process_order_stale = False
+    process_keys = sorted(process_snapshot, key=process_sort_keys.__getitem__)
+    processes = [process_snapshot[key] for key in process_keys]
+    refilter_processes()
+
+
+def apply_process_changes():
+    # once all the changes of a refresh or an event are in, the table is
+    # sorted or filtered again if any of them moved a process
+    if process_order_stale:
+        sort_processes()
+    elif process_filter_stale:
+        refilter_processes()
+
+
+def get_process_table_rows():
+    rows = []
+    for group_processes in supervisor.get_process_groups(processes):
+        if len(group_processes) == 1 and not supervisor.is_grouped_process(group_processes[0]):
+            rows += group_processes
+            continue
+
+        group = supervisor.get_process_group(group_processes)
+        rows.append(group)
+        if supervisor.get_process_group_key(group) in expanded_process_groups:
+            rows += group_processes
+
+    return rows
+
+
+def update_process_table():
+    # a filtered table lists the matching processes without their groups,
+    # and their keys are known already
+    if is_process_table_filtered():
+        set_process_table_rows([process_snapshot[key] for key in process_filter_matches],
+                               process_filter_matches)
+        return
+
+    rows = get_process_table_rows()
+    set_process_table_rows(rows, [supervisor.get_process_key(row) for row in rows])
+
+
+def set_process_table_rows(rows, row_keys):
+    # the cursor stays on the row it was on, and every row keeps its
+    # selected button
+    global process_table_rows, process_row_keys, process_row_indexes, \
+        selected_process_index, process_table_scroll_offset
+    selected_key = None
+    if len(process_table_rows) > 0:
+        selected_key = process_row_keys[selected_process_index]
+
+    process_table_rows = rows
+    process_row_keys = row_keys
+    process_row_indexes = {key: i for i, key in enumerate(process_row_keys)}
+    if selected_key in process_row_indexes:
+        selected_process_index = process_row_indexes[selected_key]
+    else:
+        selected_process_index = max(
+            0, min(selected_process_index, len(process_table_rows) - 1))
+
+    scroll_to_selected_process()
+    mark_process_table_dirty()
+
+
+def set_processes(new_snapshot):
+    # the table is rebuilt when processes come or go
+    global process_snapshot, process_search_texts, process_sort_keys
+    process_snapshot = new_snapshot
+    process_search_texts = {key: get_process_search_text(process)
+                            for key, process in process_snapshot.items()}
+    process_sort_keys = {key: supervisor.get_process_sort_key(process, process_sort)
+                         for key, process in process_snapshot.items()}
+    sort_processes()
+
+
+def update_process_row(key, old_state):
+    index = process_row_indexes.get(key)
+    if index is None:
+        return
+
+    if process_table_rows[index]["state"] != old_state or \
+            get_process_selected_button(index) not in get_process_available_buttons(index):
+        reset_process_selected_button(index)
+
+    mark_process_row_dirty(index)
+
+
+def update_process(key, process):
+    # rows share the process records of the snapshot, so the process is
+    # updated in place and the rows showing it are repainted
+    global process_filter_stale, process_order_stale
+    process_record = process_snapshot[key]
+    old_state = process_record["state"]
+    process_record.update(process)
+    process_search_texts[key] = get_process_search_text(process_record)
+    sort_key = supervisor.get_process_sort_key(process_record, process_sort)
+    if sort_key != process_sort_keys[key]:
+        process_sort_keys[key] = sort_key
+        process_order_stale = True
+
+    if is_process_table_filtered() and \
+            (len(filter_process_keys([key], process_filter)) > 0) != (key in process_row_indexes):
+        process_filter_stale = True
+
+    update_process_row(key, old_state)
+
+    group_key = supervisor.get_process_group_key(process_record)
+    if group_key in process_row_indexes:
+        group = process_table_rows[process_row_indexes[group_key]]
+        old_group_state = group["state"]
+        supervisor.update_process_group(group)
+        update_process_row(group_key, old_group_state)
+
+
+def toggle_process_group(group):
+    key = supervisor.get_process_group_key(group)
+    if key in expanded_process_groups:
+        expanded_process_groups.remove(key)
+    else:
+        expanded_process_groups.add(key)
+
+    update_process_table()
+    reset_process_selected_button(process_row_indexes[key])
+
+
+async def get_fleet_processes(cached):
+    global host_errors
+    new_processes, host_errors = await supervisor_async.get_fleet_processes(
+        config.SUPERVISOR_ENDPOINTS, cached)
+    # the hosts that didn't answer keep their last known rows
+    new_processes += [process for process in processes
+                      if process["endpoint"] in host_errors]
+
+    return new_processes
+
+
+async def update_processes(cached=False):
+    global last_poll_time
+    last_poll_time = datetime.now()
+
+    if is_fleet():
+        new_processes = await get_fleet_processes(cached)
+    else:
+        new_processes = await supervisor_async.get_processes(cached=cached)
+
+    new_snapshot = supervisor.get_process_snapshot(new_processes)
+    diff = supervisor.diff_process_snapshots(process_snapshot, new_snapshot)
+    if len(diff["added"]) > 0 or len(diff["removed"]) > 0:
+        set_processes(new_snapshot)
+    else:
+        for key in diff["changed"]:
+            update_process(key, new_snapshot[key])
+
+        apply_process_changes()
+
+    page.mark_refreshed(clear_screen=False)
+    wake_auto_refresh()
+
+
+def apply_process_state_event(event):
+    supervisor.invalidate_process_info_cache()
+    namespec = supervisor.get_namespec(event["groupname"], event["processname"])
+    if namespec not in process_snapshot:
+        # not in the table yet, so it was added since the last refresh
+        refresh()
+        return
+
+    update_process(namespec, supervisor.apply_process_state_event(
+        dict(process_snapshot[namespec]), event))
+    apply_process_changes()
+    page.mark_refreshed(clear_screen=False)
+    wake_auto_refresh()
+
+
+def get_auto_refresh_interval():
+    for process in processes:
+        if process["state"] in TRANSITIONAL_PROCESS_STATES:
+            return config.AUTO_REFRESH_INTERVAL
+
+    return config.AUTO_REFRESH_STEADY_INTERVAL
+
+
+def is_auto_refresh_blocked():
+    # polls are skipped while actions are running since they refresh the
+    # table as they finish anyway
+    return actions.is_busy() or (refresh_task is not None and not refresh_task.done())
+
+
+def wake_auto_refresh():
+    # makes the scheduler look at the table again, e.g. to poll sooner once
+    # a process started transitioning
+    if auto_refresh_wakeup is not None:
+        auto_refresh_wakeup.set()
+
+
+async def wait_for_auto_refresh(delay):
+    try:
+        await asyncio.wait_for(auto_refresh_wakeup.wait(), delay)
+    except asyncio.TimeoutError:
+        pass
+
+    auto_refresh_wakeup.clear()
+
+
+async def auto_refresh_processes():
+    global auto_refresh_interval
+    while True:
+        auto_refresh_interval = get_auto_refresh_interval()
+        delay = auto_refresh_interval
+        if last_poll_time is not None:
+            delay -= (datetime.now() - last_poll_time).total_seconds()
 
+        if delay > 0:
+            await wait_for_auto_refresh(delay)
+            continue
 
-def update_processes():
-    global processes
-    processes = supervisor.get_processes()
-    reset_selected_process_buttons()
+        if is_auto_refresh_blocked():
+            await wait_for_auto_refresh(auto_refresh_interval)
+            continue
+
+        refresh()
+        await asyncio.wait([refresh_task])
+
+
+async def follow_process_state_events():
+    # only runs while the bundled event listener is installed; the table is
+    # refreshed on every (re)connect since events may have been missed
+    while True:
+        try:
+            await supervisor_async.subscribe_process_state_events(
+                refresh, apply_process_state_event)
+        except (OSError, ValueError):
+            pass
+
+        await asyncio.sleep(config.EVENTS_RECONNECT_INTERVAL)
+
+
+def run_in_background(fn, *args):
+    async def run():
+        global last_action_output
+        try:
+            await fn(*args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            last_action_output = str(e)
+
+    return eventloop.spawn(run())
+
+
+def get_action_step(action, args, endpoint):
+    def step():
+        transport.set_endpoint(endpoint)
+        if not is_fleet():
+            return action(*args)
+
+        host = transport.get_endpoint_label(endpoint)
+        try:
+            return f"{host}: {action(*args)}"
+        except actions.JobCancelled as e:
+            raise actions.JobCancelled(f"{host}: {e}")
+        except Exception as e:
+            raise Exception(f"{host}: {e}")
+
+    return step
+
+
+def run_action(label, action, *args, endpoints=None):
+    # actions use the blocking supervisor API, so they are queued for the
+    # worker thread and the page refreshes as each one is done. An action
+    # is run once per endpoint.
+    if endpoints is None:
+        endpoints = [None]
+
+    def on_done(job):
+        eventloop.call_soon_threadsafe(finish_action, job)
+
+    steps = [get_action_step(action, args, endpoint) for endpoint in endpoints]
+    actions.submit(label, steps, on_done, eventloop.request_redraw_threadsafe)
+
+
+def finish_action(job):
+    global last_action_output
+    output = job["output"]
+    if job["cancelled"]:
+        output = output + [f"Cancelled {job['label']}."]
+
+    if len(output) > 0:
+        last_action_output = "\n".join(output)
+
+    refresh()
 
 
 def cycle_process(direction=common.DIRECTION_DOWN):
     global process_table_scroll_offset, selected_process_index
-    if current_section == SECTION_PROCESS_TABLE:
-        reset_selected_process_buttons()
+    if current_section == SECTION_PROCESS_TABLE and len(process_table_rows) > 0:
+        # the process being left goes back to its first button
+        reset_process_selected_button(selected_process_index)
 
         if direction == common.DIRECTION_UP:
             selected_process_index = selected_process_index - \
-                1 if selected_process_index > 0 else len(processes) - 1
+                1 if selected_process_index > 0 else len(process_table_rows) - 1
         elif direction == common.DIRECTION_DOWN:
             selected_process_index = selected_process_index + \
-                1 if selected_process_index < len(processes) - 1 else 0
+                1 if selected_process_index < len(process_table_rows) - 1 else 0
 
-        if selected_process_index < process_table_scroll_offset:
-            process_table_scroll_offset = selected_process_index
-        elif selected_process_index >= process_table_scroll_offset + visible_processes_num:
-            process_table_scroll_offset = selected_process_index - visible_processes_num + 1
+        scroll_to_selected_process()
+        mark_process_row_dirty(selected_process_index)
 
 
 def handle_input_key_enter_section_header():
-    global last_action_output
     action = page.get_selected_button_action()
     if action is None:
         return
 
-    output = action()
-    if output is not None:
-        last_action_output = output
+    if page.selected_button in IMMEDIATE_PAGE_BUTTONS:
+        action()
+        return
 
-    refresh()
+    endpoints = None
+    if is_fleet():
+        endpoints = config.SUPERVISOR_ENDPOINTS
 
+    run_action(page.get_selected_button_label(), action, endpoints=endpoints)
 
-def handle_input_key_enter_section_table():
-    global last_action_output
+
+async def handle_input_key_enter_section_table():
     selected_process_button = get_selected_process_button()
-    process_name = get_selected_process_name()
-    if selected_process_button in [PROCESS_BUTTON_TAIL_STDOUT, PROCESS_BUTTON_TAIL_STDERR]:
-        log_source = supervisor.LOG_SOURCE_STDOUT
-        if selected_process_button == PROCESS_BUTTON_TAIL_STDERR:
-            log_source = supervisor.LOG_SOURCE_STDERR
+    namespec = get_selected_process_namespec()
+    endpoint = get_selected_process_endpoint()
+    if selected_process_button in [PROCESS_BUTTON_EXPAND_GROUP, PROCESS_BUTTON_COLLAPSE_GROUP]:
+        toggle_process_group(get_selected_process_row())
+    elif selected_process_button in PROCESS_BUTTON_TAIL_LOG_SOURCES:
+        log_sources, merge = PROCESS_BUTTON_TAIL_LOG_SOURCES[selected_process_button]
+        tails = [(supervisor.get_process_namespec(process), log_source, process.get("endpoint"))
+                 for process in get_tailed_processes() for log_source in log_sources]
+
+        # the table isn't on the screen while tailing, so it's not kept up
+        # to date either
+        stop_background_tasks()
+        try:
+            await page_tail.enter(tails, merge)
+        finally:
+            start_background_tasks()
 
-        page_tail.enter(process_name, log_source)
         init()
+        refresh(cached=True)
     else:
         action = get_selected_process_button_action()
         if action is None:
             return
 
-        last_action_output = action(process_name)
+        # supervisord knows the processes of a group by their namespec, and
+        # the group calls take the bare group name
+        name = namespec
+        if supervisor.is_process_group(get_selected_process_row()):
+            name = get_selected_process_row()["group"]
 
-    refresh()
+        run_action(f"{get_selected_process_button_label()} {namespec}",
+                   action, name, endpoints=[endpoint])
 
 
-def handle_input_key_enter():
+async def handle_input_key_enter():
     global last_action_output
     if current_section == SECTION_HEADER:
         handle_input_key_enter_section_header()
     elif current_section == SECTION_PROCESS_TABLE:
         try:
-            handle_input_key_enter_section_table()
+            await handle_input_key_enter_section_table()
         except Exception as e:
             last_action_output = str(e)
             init()
@@ -329,34 +951,119 @@ def handle_input_key_tab():
     cycle_section()
 
 
-def draw_process_table_row(process_table_content_start_row, process_index):
-    row = screen.get_and_inc_current_draw_row_num()
-    table_columns_num = len(PROCESS_TABLE_COLUMN_NAMES) + \
+def handle_input_key_space():
+    # marks the selected process to be tailed along with the one a tail
+    # button is pressed on
+    if current_section != SECTION_PROCESS_TABLE or len(process_table_rows) == 0 or \
+            supervisor.is_process_group(get_selected_process_row()):
+        return
+
+    key = process_row_keys[selected_process_index]
+    if key in marked_process_keys:
+        marked_process_keys.remove(key)
+    else:
+        marked_process_keys.add(key)
+
+    mark_process_row_dirty(selected_process_index)
+
+
+def handle_input_key_slash():
+    # the filter takes the keys that are typed until Enter, which keeps it,
+    # or Escape, which clears it; the others still work while typing. Once
+    # kept, Escape clears it instead of leaving the page.
+    global editing_process_filter, current_section
+    editing_process_filter = True
+    current_section = SECTION_PROCESS_TABLE
+    mark_process_row_dirty(selected_process_index)
+    page.set_text_input(handle_process_filter_input)
+
+
+def stop_editing_process_filter():
+    global editing_process_filter
+    editing_process_filter = False
+    page.set_text_input(None)
+    if is_process_table_filtered():
+        page.set_text_input(handle_kept_process_filter_input)
+
+
+def handle_kept_process_filter_input(k):
+    if k != keys.ESCAPE:
+        return False
+
+    page.set_text_input(None)
+    set_process_filter("")
+
+    return True
+
+
+def handle_process_filter_input(k):
+    if k == keys.ENTER:
+        stop_editing_process_filter()
+    elif k == keys.ESCAPE:
+        set_process_filter("")
+        stop_editing_process_filter()
+    elif k in keys.BACKSPACES:
+        set_process_filter(process_filter[:-1])
+    elif 32 <= k < 127:
+        set_process_filter(process_filter + chr(k))
+    else:
+        return False
+
+    return True
+
+
+def get_process_table_column_names():
+    if is_fleet():
+        return FLEET_PROCESS_TABLE_COLUMN_NAMES
+
+    return PROCESS_TABLE_COLUMN_NAMES
+
+
+def get_process_row_name(process):
+    if supervisor.is_process_group(process):
+        marker = "+"
+        if supervisor.get_process_group_key(process) in expanded_process_groups:
+            marker = "-"
+
+        return f"{marker} {process['group']} ({len(process['processes'])})"
+
+    name = process["name"]
+    if supervisor.is_grouped_process(process):
+        # filtered processes aren't listed under their group
+        if is_process_table_filtered():
+            name = supervisor.get_process_namespec(process)
+        else:
+            name = f"  {name}"
+
+    if supervisor.get_process_key(process) in marked_process_keys:
+        name = f"* {name}"
+
+    return name
+
+
+def draw_process_table_row(row, process_index):
+    table_columns_num = len(get_process_table_column_names()) + \
         MAX_VISIBLE_PROCESS_BUTTONS_NUM // 2
-    process = processes[process_index]
-    state, description, name = process["state"], process["description"], process["name"]
+    process = process_table_rows[process_index]
+    columns = [process["state"], process["description"],
+               get_process_row_name(process)]
+    if is_fleet():
+        columns = [process["host"]] + columns
+
     column_width = max(10, screen.width // table_columns_num)
-    process_details = "{:<{}}{:<{}}{:<{}}".format(
-        common.truncate_string(state, column_width),
-        column_width,
-        common.truncate_string(description, column_width),
-        column_width,
-        common.truncate_string(name, column_width),
-        column_width,
-    )
-
-    row_in_visible_table = row - process_table_content_start_row
-    selected_process_in_visible_table = selected_process_index - \
-        process_table_scroll_offset
+    process_details = "".join(["{:<{}}".format(
+        common.truncate_string(column, column_width), column_width) for column in columns])
 
     is_selected_process = current_section == SECTION_PROCESS_TABLE and \
-        row_in_visible_table == selected_process_in_visible_table
+        process_index == selected_process_index
 
+    # rows are repainted in place, so whatever was there before goes first
+    screen.add_blank_line(row)
     screen.addstr(row, 0, process_details, highlight=is_selected_process)
 
     start_pos = len(process_details)
 
-    selected_process_button = selected_process_buttons[selected_process_index]
+    selected_process_button = get_process_selected_button(process_index)
     available_buttons = get_process_available_buttons(process_index)
     for button in available_buttons:
         button_label = get_process_button_label(button)
@@ -368,44 +1075,47 @@ def draw_process_table_row(process_table_content_start_row, process_index):
 def draw_process_table_columns():
     row = screen.get_and_inc_current_draw_row_num()
 
-    table_columns_num = len(PROCESS_TABLE_COLUMN_NAMES) + \
+    table_columns_num = len(get_process_table_column_names()) + \
         MAX_VISIBLE_PROCESS_BUTTONS_NUM // 2
 
     start_pos = 0
     column_width = screen.width // table_columns_num
-    for name in PROCESS_TABLE_COLUMN_NAMES:
+    for name in get_process_table_column_names():
         screen.addstr(row, start_pos, "{:<{}}".format(
             name, column_width))
         start_pos += column_width
 
 
 def draw_process_table_content():
-    if len(processes) > 0:
-        display_processes = processes[process_table_scroll_offset:
-                                      process_table_scroll_offset + visible_processes_num]
-        process_table_content_start_row = screen.current_draw_row_num
-        for i, _ in enumerate(display_processes):
-            draw_process_table_row(
-                process_table_content_start_row, i + process_table_scroll_offset)
-    else:
+    # only the rows that changed since the last draw are repainted
+    global redraw_process_table
+    process_table_content_start_row = screen.current_draw_row_num
+    for i in range(visible_processes_num):
+        row = screen.get_and_inc_current_draw_row_num()
+        process_index = i + process_table_scroll_offset
+        if not redraw_process_table and process_index not in dirty_process_rows:
+            continue
+
+        if process_index < len(process_table_rows):
+            draw_process_table_row(row, process_index)
+        else:
+            screen.add_blank_line(row)
+
+    if redraw_process_table and len(process_table_rows) == 0:
         no_processes_message = "No Processes"
         message_x = (screen.width - len(no_processes_message)) // 2
-        screen.addstr(screen.get_and_inc_current_draw_row_num(),
+        screen.addstr(process_table_content_start_row,
                       message_x, no_processes_message)
 
-    displayed_lines = len(display_processes) if len(processes) > 0 else 1
-    remaining_lines = visible_processes_num - displayed_lines
-    for _ in range(remaining_lines):
-        screen.addstr(screen.get_and_inc_current_draw_row_num(), 0, "")
-
+    redraw_process_table = False
+    dirty_process_rows.clear()
 
 
 def draw_process_table():
     global visible_processes_num, process_table_scroll_length
     draw_process_table_columns()
 
-    screen.hline(screen.get_and_inc_current_draw_row_num(),
-                 0, curses.ACS_HLINE, screen.width)
+    screen.hline(screen.get_and_inc_current_draw_row_num(), 0, screen.width)
 
     visible_processes_num = screen.height
     # subtract the header rows
@@ -434,25 +1144,62 @@ def clear_status():
 
 
 def draw_status():
-    screen.hline(screen.get_and_inc_current_draw_row_num(),
-                 0, curses.ACS_HLINE, screen.width)
+    screen.hline(screen.get_and_inc_current_draw_row_num(), 0, screen.width)
 
     clear_status()
+    output_lines = last_action_output.strip().split('\n')
+    # job progress and unreachable hosts go first, the last lines of the
+    # output fill up the rest
+    head_lines = list(host_errors.values())
+    progress = actions.get_progress()
+    if progress != "":
+        head_lines = [progress] + head_lines
+
+    if len(head_lines) > 0:
+        output_lines = head_lines[:STATUS_NUM_ROWS] + \
+            output_lines[len(output_lines) - max(0, STATUS_NUM_ROWS - len(head_lines)):]
+
     status_lines = [""] * STATUS_NUM_ROWS
-    for i, line in enumerate(last_action_output.strip().split('\n')[-STATUS_NUM_ROWS:]):
-        status_lines[i] = line.strip()
+    for i, line in enumerate(output_lines[-STATUS_NUM_ROWS:]):
+        status_lines[i] = common.truncate_string(
+            line.strip(), screen.width - 1)
 
+    # the screen isn't cleared between draws, so lines are padded to cover
+    # longer ones drawn before
     for line in status_lines:
-        screen.addstr(screen.get_and_inc_current_draw_row_num(), 0, line)
+        screen.addstr(screen.get_and_inc_current_draw_row_num(),
+                      0, line.ljust(screen.width - 1))
+
+
+def get_auto_refresh_status():
+    if last_poll_time is None:
+        return ""
+
+    last_poll = last_poll_time.strftime("%H:%M:%S")
+    if actions.is_busy():
+        return f" [auto refresh waiting for jobs, last poll {last_poll}]"
+
+    return f" [auto refresh every {auto_refresh_interval:g}s, last poll {last_poll}]"
+
+
+def draw_process_filter():
+    row = screen.get_and_inc_current_draw_row_num()
+    screen.add_blank_line(row)
+    if not editing_process_filter and not is_process_table_filtered():
+        return
+
+    cursor = "_" if editing_process_filter else ""
+    line = f"Filter: {process_filter}{cursor}  ({len(process_table_rows)} of {len(processes)} processes)"
+    screen.addstr(row, 0, common.truncate_string(line, screen.width - 1))
 
 
 def draw_header():
     global header_num_rows
     start_draw_row_num = screen.current_draw_row_num
 
-    page.draw_title(PAGE_TITLE)
+    page.draw_title(PAGE_TITLE, get_auto_refresh_status())
     page.draw_buttons(current_section != SECTION_HEADER)
-    screen.add_blank_line(screen.get_and_inc_current_draw_row_num())
+    draw_process_filter()
 
     header_num_rows = screen.current_draw_row_num - start_draw_row_num
 
@@ -463,7 +1210,7 @@ def draw():
     draw_header()
     draw_process_table()
     draw_status()
-    page.draw_keybindings_help()
+    page.draw_keybindings_help(PROCESS_FILTER_HELP + TAIL_MARK_HELP)
 
     screen.refresh()
 
@@ -477,25 +1224,50 @@ KEYBINDINGS = {
     keys.DOWN: handle_input_key_down,
     keys.TAB: handle_input_key_tab,
     keys.ENTER: handle_input_key_enter,
+    keys.SLASH: handle_input_key_slash,
+    keys.SPACE: handle_input_key_space,
 }
 
 
 def init():
     page.init(PAGE_BUTTONS, PAGE_BUTTON_REFRESH, KEYBINDINGS)
+    stop_editing_process_filter()
+    # another page may have been on the screen
+    screen.clear()
+    mark_process_table_dirty()
+
+
+def start_background_tasks():
+    global events_task, auto_refresh_task, auto_refresh_wakeup
+    auto_refresh_wakeup = asyncio.Event()
+    # the event listener only reports on the local supervisord
+    if not is_fleet():
+        events_task = eventloop.spawn(follow_process_state_events())
+    auto_refresh_task = eventloop.spawn(auto_refresh_processes())
 
 
-def enter():
+def stop_background_tasks():
+    if events_task is not None:
+        events_task.cancel()
+    auto_refresh_task.cancel()
+
+
+async def enter():
     init()
     refresh()
+    start_background_tasks()
 
     last_process_table_scroll_offset = process_table_scroll_offset
     while not page.exit:
-        screen.handle_window_resize()
+        if screen.handle_window_resize():
+            mark_process_table_dirty()
 
         if last_process_table_scroll_offset != process_table_scroll_offset:
-            screen.clear()
+            mark_process_table_dirty()
             last_process_table_scroll_offset = process_table_scroll_offset
 
         draw()
-        page.handle_input()
-        time.sleep(0.01)
+        await eventloop.wait_for_redraw()
+        await page.handle_input()
+
+    stop_background_tasks()
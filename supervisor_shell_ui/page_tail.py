@@ -20,23 +20,57 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 LICENSE HEADER STOP"""
-import curses
-import time
+import re
+import bisect
+import asyncio
 import textwrap
 
+from collections import deque
+from itertools import islice
+
 from supervisor_shell_ui import common
+from supervisor_shell_ui import config
+from supervisor_shell_ui import eventloop
 from supervisor_shell_ui import keys
 from supervisor_shell_ui import supervisor
+from supervisor_shell_ui import supervisor_async
 from supervisor_shell_ui import screen
+from supervisor_shell_ui import transport
 from supervisor_shell_ui import page
 
 PAGE_TITLE = "Tail"
 PAGE_BUTTON_REFRESH = 0
+PAGE_BUTTON_FOLLOW = 1
+
+PAGE_BUTTON_FOLLOW_LABEL_ON = "Stop Following"
+PAGE_BUTTON_FOLLOW_LABEL_OFF = "Follow"
+
+# the most bytes one read of a log returns: the history the first read
+# brings along, and the most a poll takes of what was logged since the last
+TAIL_READ_SIZE = 64 * 1024
+# bytes a line of the scrollback takes besides its text
+LOG_LINE_OVERHEAD = 180
+# logs that fit side by side on the narrowest screen
+MAX_TAIL_PANES = 4
+
+SEARCH_HELP = ["/: Search", "n/N: Next/Previous Match"]
+PANES_HELP = ["Tab: Next Pane"]
 
 
-@page.refresh
 def refresh():
-    update_process_log()
+    global refresh_task
+    if refresh_task is not None:
+        refresh_task.cancel()
+
+    refresh_task = eventloop.spawn(update_process_log())
+
+
+def toggle_follow():
+    global follow
+    follow = not follow
+    PAGE_BUTTONS[PAGE_BUTTON_FOLLOW]["label"] = PAGE_BUTTON_FOLLOW_LABEL_ON \
+        if follow else PAGE_BUTTON_FOLLOW_LABEL_OFF
+    wake_follow()
 
 
 PAGE_BUTTONS = {
@@ -44,20 +78,423 @@ PAGE_BUTTONS = {
         "label": "Refresh",
         "action": refresh,
     },
+    PAGE_BUTTON_FOLLOW: {
+        "label": PAGE_BUTTON_FOLLOW_LABEL_ON,
+        "action": toggle_follow,
+    },
 }
 
-process_name = ""
-log_source = ""
-last_action_output = ""
-process_name = ""
-log_source = ""
+# the cursors of the logs that are tailed, which are all read in the same
+# round trip, and the panes they're shown in: one per log side by side, or
+# a single one that the logs are merged into a line at a time, in the
+# order the lines arrive
+tail_cursors = []
+panes = []
+selected_pane_index = 0
+# what's typed after /, and once it's entered, the search and the regex it
+# compiles to. Each pane keeps the lines it matches, and searches new lines
+# as they arrive.
+search_input = ""
+editing_search = False
+search_pattern = ""
+search_regex = None
+search_error = ""
+refresh_task = None
+follow_task = None
+follow_wakeup = None
+fetch_lock = None
+follow = True
+follow_interval = config.TAIL_FOLLOW_INTERVAL
+visible_lines_num = 0
+
+
+def get_pane(cursors, max_size):
+    return {
+        "cursors": cursors,
+        # the start of each log's line that's still waiting for its newline,
+        # and what the lines of each log are marked with, when there's more
+        # than one log in the pane
+        "partial_lines": ["" for _ in cursors],
+        "line_prefixes": get_line_prefixes(cursors),
+        # the scrollback: the log as lines, the last of which may still be
+        # growing, and the rows each line is wrapped into at wrap_width. Only
+        # lines that arrive are wrapped, and all of them again when the width
+        # changes. Lines are dropped from the top once size goes over
+        # max_size.
+        "lines": deque([""]),
+        "wrapped_lines": deque([[]]),
+        "wrap_width": 0,
+        "size": 0,
+        "max_size": max_size,
+        # lines are numbered from the first one read, so their numbers stay
+        # put as lines are dropped from the top; this is the number of
+        # lines[0]
+        "first_line_num": 0,
+        "rows_num": 0,
+        # how many rows the view is scrolled up from the bottom of the log
+        "scroll_offset": 0,
+        # the numbers of the lines the search matches, in order
+        "search_matches": [],
+        "current_search_match": None,
+        # the columns the pane is drawn in
+        "x": 0,
+        "width": screen.width,
+    }
+
+
+def set_tails(tails, merge=False):
+    # tails are (name, log source, endpoint) of the logs to show. The
+    # scrollback is shared out between the panes.
+    global tail_cursors, panes, selected_pane_index
+    if not merge and len(tails) > MAX_TAIL_PANES:
+        raise Exception(f"At most {MAX_TAIL_PANES} logs can be tailed side by side")
+
+    tail_cursors = [supervisor.get_tail_cursor(
+        name, log_source, get_tail_byte_count(), endpoint) for name, log_source, endpoint in tails]
+    if merge:
+        panes = [get_pane(tail_cursors, config.TAIL_SCROLLBACK_SIZE)]
+    else:
+        panes = [get_pane([cursor], config.TAIL_SCROLLBACK_SIZE // len(tail_cursors))
+                 for cursor in tail_cursors]
+
+    selected_pane_index = 0
+    layout_panes()
+    for pane in panes:
+        set_log(pane, "")
+
+
+def layout_panes():
+    # panes share the width, with a column between each two for a line
+    pane_width = (screen.width - len(panes) + 1) // len(panes)
+    x = 0
+    for pane in panes:
+        pane["x"] = x
+        pane["width"] = pane_width
+        x += pane_width + 1
+
+    panes[-1]["width"] = screen.width - panes[-1]["x"]
+
+
+def get_selected_pane():
+    return panes[selected_pane_index]
+
+
+def get_tail_byte_count():
+    # a poll that finds more than this logged since the last one starts over
+    # from the end of the log
+    return max(screen.height * screen.width, TAIL_READ_SIZE)
+
+
+def get_log_line_size(line):
+    # about the memory a line takes, counting its wrapped rows
+    return 2 * len(line) + LOG_LINE_OVERHEAD
+
+
+def wrap_log_line(line, wrap_width):
+    # most lines fit and have nothing for textwrap to replace, which is
+    # what it would make of them too
+    if len(line) <= wrap_width and line.isprintable():
+        line = line.rstrip()
+        return [line] if line != "" else []
+
+    return textwrap.wrap(line, wrap_width)
+
+
+def rewrap_log(pane):
+    # the last column of the pane is left blank
+    pane["wrap_width"] = pane["width"] - 1
+    pane["wrapped_lines"] = deque(
+        wrap_log_line(line, pane["wrap_width"]) for line in pane["lines"])
+    pane["rows_num"] = sum(len(rows) for rows in pane["wrapped_lines"])
+
+
+def set_log(pane, data):
+    pane["first_line_num"] += len(pane["lines"])
+    pane["lines"] = deque(data.split("\n"))
+    pane["size"] = sum(get_log_line_size(line) for line in pane["lines"])
+    rewrap_log(pane)
+    search_pane(pane)
+    trim_log(pane)
+
+
+def append_log(pane, data):
+    if data == "":
+        return
+
+    lines = pane["lines"]
+    wrapped_lines = pane["wrapped_lines"]
+    new_lines = data.split("\n")
+    # the first part finishes the line that was still growing
+    line_num = pane["first_line_num"] + len(lines) - 1
+    pane["size"] -= get_log_line_size(lines[-1])
+    pane["rows_num"] -= len(wrapped_lines[-1])
+    lines[-1] += new_lines[0]
+    wrapped_lines[-1] = wrap_log_line(lines[-1], pane["wrap_width"])
+    pane["size"] += get_log_line_size(lines[-1])
+    pane["rows_num"] += len(wrapped_lines[-1])
+    new_lines[0] = lines[-1]
+
+    for line in new_lines[1:]:
+        rows = wrap_log_line(line, pane["wrap_width"])
+        lines.append(line)
+        wrapped_lines.append(rows)
+        pane["size"] += get_log_line_size(line)
+        pane["rows_num"] += len(rows)
+
+    if search_regex is not None:
+        # the line that grew is searched again
+        search_matches = pane["search_matches"]
+        if len(search_matches) > 0 and search_matches[-1] == line_num:
+            search_matches.pop()
+
+        search_log_lines(pane, line_num, new_lines)
+
+    trim_log(pane)
+
+
+def end_log_line(pane):
+    # what comes next starts a line of its own
+    if pane["lines"][-1] != "":
+        append_log(pane, "\n")
+
+
+def get_line_prefixes(cursors):
+    # merged lines are marked with what tells their logs apart
+    if len(cursors) == 1:
+        return [""]
+
+    labels = [get_process_label(cursor) for cursor in cursors]
+    log_sources = [cursor["log_source"] for cursor in cursors]
+    if len(set(labels)) == 1:
+        labels = log_sources
+    elif len(set(log_sources)) > 1:
+        labels = [f"{label} {log_source}" for label, log_source in zip(labels, log_sources)]
+
+    label_width = max(len(label) for label in labels)
+
+    return [f"{label:<{label_width}} | " for label in labels]
+
+
+def merge_log(pane, index, data, restarted):
+    # only whole lines are merged, so the start of a line waits in the
+    # pane until its newline arrives
+    partial_line = pane["partial_lines"][index]
+    if restarted and partial_line != "":
+        partial_line += "\n"
+
+    new_lines = (partial_line + data).split("\n")
+    pane["partial_lines"][index] = new_lines.pop()
+    if len(new_lines) > 0:
+        prefix = pane["line_prefixes"][index]
+        append_log(pane, "".join(f"{prefix}{line}\n" for line in new_lines))
+
+
+def trim_log(pane):
+    lines = pane["lines"]
+    while pane["size"] > pane["max_size"] and len(lines) > 1:
+        pane["size"] -= get_log_line_size(lines.popleft())
+        pane["rows_num"] -= len(pane["wrapped_lines"].popleft())
+        pane["first_line_num"] += 1
+
+    search_matches = pane["search_matches"]
+    if len(search_matches) > 0 and search_matches[0] < pane["first_line_num"]:
+        del search_matches[:bisect.bisect_left(search_matches, pane["first_line_num"])]
+
+
+def get_log_line_rows_index(pane, line_num):
+    # the index of the line's first row among all rows of the scrollback
+    return sum(len(rows) for rows in islice(
+        pane["wrapped_lines"], line_num - pane["first_line_num"]))
+
+
+def get_log_line_num(pane, rows_index):
+    # the number of the line that the row at rows_index is part of
+    rows_num = 0
+    for i, rows in enumerate(pane["wrapped_lines"]):
+        rows_num += len(rows)
+        if rows_num > rows_index:
+            return pane["first_line_num"] + i
+
+    return pane["first_line_num"] + len(pane["lines"]) - 1
+
+
+def search_log_lines(pane, first_line_num, lines):
+    for i, line in enumerate(lines):
+        if search_regex.search(line) is not None:
+            pane["search_matches"].append(first_line_num + i)
+
+
+def search_pane(pane):
+    pane["search_matches"] = []
+    pane["current_search_match"] = None
+    if search_regex is not None:
+        search_log_lines(pane, pane["first_line_num"], pane["lines"])
 
 
-def update_process_log():
-    global last_action_output
-    byte_count = (screen.height) * screen.width
-    last_action_output = supervisor.tail_process_log(
-        process_name, log_source, byte_count)
+def set_search(pattern):
+    global search_pattern, search_regex, search_error
+    search_pattern = pattern
+    search_regex = None
+    search_error = ""
+    if pattern != "":
+        # patterns without capitals ignore case
+        flags = re.IGNORECASE if pattern == pattern.lower() else 0
+        try:
+            search_regex = re.compile(pattern, flags)
+        except re.error as e:
+            search_error = str(e)
+
+    for pane in panes:
+        search_pane(pane)
+
+
+def show_log_line(pane, line_num):
+    # the line goes to the top of the view, or as close to it as the end of
+    # the log allows
+    end_index = get_log_line_rows_index(pane, line_num) + visible_lines_num
+    pane["scroll_offset"] = max(0, pane["rows_num"] - end_index)
+    if pane["scroll_offset"] == 0:
+        wake_follow()
+
+
+def show_search_match(pane, index):
+    pane["current_search_match"] = pane["search_matches"][index]
+    show_log_line(pane, pane["current_search_match"])
+
+
+def show_last_visible_search_match(pane):
+    # the last match that's in or above the view, since it's the bottom of
+    # the log that's usually looked at
+    search_matches = pane["search_matches"]
+    if len(search_matches) == 0:
+        return
+
+    last_visible_line_num = get_log_line_num(
+        pane, pane["rows_num"] - pane["scroll_offset"] - 1)
+    show_search_match(pane, max(bisect.bisect_right(
+        search_matches, last_visible_line_num) - 1, 0))
+
+
+def cycle_search_match(direction=common.DIRECTION_DOWN):
+    # matches further down are newer
+    pane = get_selected_pane()
+    search_matches = pane["search_matches"]
+    current_search_match = pane["current_search_match"]
+    if len(search_matches) == 0:
+        return
+
+    if current_search_match is None:
+        show_last_visible_search_match(pane)
+    elif direction == common.DIRECTION_DOWN:
+        index = bisect.bisect_right(search_matches, current_search_match)
+        if index < len(search_matches):
+            show_search_match(pane, index)
+    elif direction == common.DIRECTION_UP:
+        index = bisect.bisect_left(search_matches, current_search_match) - 1
+        if index >= 0:
+            show_search_match(pane, index)
+
+
+def update_log(pane, restarts):
+    # restarts are what the counts of the pane's cursors were before they
+    # were advanced. If one changed, that log was rotated or more was logged
+    # than was read, so the scrollback doesn't continue into what was read.
+    rows_num = pane["rows_num"]
+    cursors = pane["cursors"]
+    if len(cursors) == 1:
+        if cursors[0]["restarts"] != restarts[0]:
+            end_log_line(pane)
+
+        append_log(pane, cursors[0]["new_data"])
+    else:
+        for i, cursor in enumerate(cursors):
+            merge_log(pane, i, cursor["new_data"], cursor["restarts"] != restarts[i])
+
+    # a view that's scrolled up stays on the rows it shows
+    if pane["scroll_offset"] > 0:
+        pane["scroll_offset"] += pane["rows_num"] - rows_num
+
+
+async def fetch_process_log():
+    # refreshes and follow polls share the cursors, so they take turns
+    async with fetch_lock:
+        # only what was logged since the last fetch is downloaded, for all
+        # logs in one round trip
+        for cursor in tail_cursors:
+            cursor["byte_count"] = get_tail_byte_count()
+
+        restarts = [[cursor["restarts"] for cursor in pane["cursors"]] for pane in panes]
+        await supervisor_async.advance_tail_cursors(tail_cursors)
+        for pane, pane_restarts in zip(panes, restarts):
+            update_log(pane, pane_restarts)
+
+
+@page.refresh
+async def update_process_log():
+    await fetch_process_log()
+    # of several logs, some may be empty
+    if all(cursor["data"] == "" for cursor in tail_cursors):
+        supervisor.must_have_log_data(
+            tail_cursors[0]["name"], tail_cursors[0]["log_source"], "")
+
+
+def is_following():
+    # following pauses while every pane is scrolled up
+    return follow and any(pane["scroll_offset"] == 0 for pane in panes)
+
+
+def wake_follow():
+    global follow_interval
+    follow_interval = config.TAIL_FOLLOW_INTERVAL
+    if follow_wakeup is not None:
+        follow_wakeup.set()
+
+
+async def wait_for_follow_poll():
+    try:
+        await asyncio.wait_for(follow_wakeup.wait(), follow_interval)
+    except asyncio.TimeoutError:
+        pass
+
+    follow_wakeup.clear()
+
+
+async def follow_process_log():
+    global follow_interval
+    while True:
+        await wait_for_follow_poll()
+        if not is_following():
+            continue
+
+        offsets = [cursor["offset"] for cursor in tail_cursors]
+        await fetch_process_log()
+        page.mark_refreshed(clear_screen=False)
+
+        # back off while the processes are quiet
+        if [cursor["offset"] for cursor in tail_cursors] == offsets:
+            follow_interval = min(
+                follow_interval * 2, config.TAIL_FOLLOW_MAX_INTERVAL)
+        else:
+            follow_interval = config.TAIL_FOLLOW_INTERVAL
+
+
+def raise_task_errors():
+    # errors end the page and are shown on the one it was entered from
+    for task in [refresh_task, follow_task]:
+        if task is not None and task.done() and \
+                not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+
+def scroll_process_log(direction=common.DIRECTION_UP, rows_num=1):
+    pane = get_selected_pane()
+    max_scroll_offset = max(0, pane["rows_num"] - visible_lines_num)
+    if direction == common.DIRECTION_UP:
+        pane["scroll_offset"] = min(pane["scroll_offset"] + rows_num, max_scroll_offset)
+    elif direction == common.DIRECTION_DOWN:
+        pane["scroll_offset"] = max(pane["scroll_offset"] - rows_num, 0)
+        if pane["scroll_offset"] == 0:
+            wake_follow()
 
 
 def handle_input_key_enter():
@@ -76,49 +513,257 @@ def handle_input_key_left():
     page.cycle_button(common.DIRECTION_LEFT)
 
 
-def draw_process_log():
-    output_lines = last_action_output.split('\n')
-    formatted_output_lines = []
-    for line in output_lines:
-        formatted_output_lines.extend(
-            textwrap.wrap(line, screen.width - 1))
+def handle_input_key_up():
+    scroll_process_log(common.DIRECTION_UP)
+
 
+def handle_input_key_down():
+    scroll_process_log(common.DIRECTION_DOWN)
+
+
+def handle_input_key_page_up():
+    scroll_process_log(common.DIRECTION_UP, visible_lines_num)
+
+
+def handle_input_key_page_down():
+    scroll_process_log(common.DIRECTION_DOWN, visible_lines_num)
+
+
+def handle_input_key_tab():
+    # scrolling and search matches go to the selected pane
+    global selected_pane_index
+    selected_pane_index = (selected_pane_index + 1) % len(panes)
+
+
+def handle_input_key_n():
+    cycle_search_match(common.DIRECTION_DOWN)
+
+
+def handle_input_key_shift_n():
+    cycle_search_match(common.DIRECTION_UP)
+
+
+def handle_input_key_slash():
+    # the search takes the keys that are typed until Enter, which searches,
+    # or Escape, which keeps the last search. Once there's a search, Escape
+    # clears it instead of leaving the page.
+    global editing_search, search_input
+    editing_search = True
+    search_input = ""
+    page.set_text_input(handle_search_input)
+
+
+def stop_editing_search():
+    global editing_search
+    editing_search = False
+    page.set_text_input(None)
+    if search_pattern != "":
+        page.set_text_input(handle_kept_search_input)
+
+
+def handle_kept_search_input(k):
+    if k != keys.ESCAPE:
+        return False
+
+    page.set_text_input(None)
+    set_search("")
+
+    return True
+
+
+def handle_search_input(k):
+    global search_input
+    if k == keys.ENTER:
+        set_search(search_input)
+        stop_editing_search()
+        for pane in panes:
+            show_last_visible_search_match(pane)
+    elif k == keys.ESCAPE:
+        stop_editing_search()
+    elif k in keys.BACKSPACES:
+        search_input = search_input[:-1]
+    elif 32 <= k < 127:
+        search_input += chr(k)
+    else:
+        return False
+
+    return True
+
+
+def get_log_rows(pane, start_index, end_index):
+    # walks up from the last line, so the lines above the view aren't
+    # looked at
+    rows = []
+    line_end_index = pane["rows_num"]
+    for line_rows in reversed(pane["wrapped_lines"]):
+        if line_end_index <= start_index:
+            break
+
+        line_start_index = line_end_index - len(line_rows)
+        if line_start_index < end_index:
+            rows[:0] = line_rows[max(start_index - line_start_index, 0):
+                                 end_index - line_start_index]
+
+        line_end_index = line_start_index
+
+    return rows
+
+
+def draw_pane(pane, start_row):
+    if pane["wrap_width"] != pane["width"] - 1:
+        rewrap_log(pane)
+
+    # the top of the scrollback may have been dropped since the last frame
+    pane["scroll_offset"] = min(
+        pane["scroll_offset"], max(0, pane["rows_num"] - visible_lines_num))
+    end_index = max(0, pane["rows_num"] - pane["scroll_offset"])
+    start_index = max(0, end_index - visible_lines_num)
+    truncated_formatted_output_lines = get_log_rows(pane, start_index, end_index)
+
+    while len(truncated_formatted_output_lines) < visible_lines_num:
+        truncated_formatted_output_lines.append("")
+
+    # lines are padded to the full width since new data is drawn over the
+    # old without clearing the screen
+    for i, line in enumerate(truncated_formatted_output_lines):
+        row = start_row + i
+        screen.addstr(row, pane["x"], line.ljust(pane["wrap_width"]))
+        if search_regex is not None:
+            draw_search_matches(row, pane["x"], line)
+
+
+def draw_pane_labels():
+    row = screen.get_and_inc_current_draw_row_num()
+    screen.add_blank_line(row)
+    for i, pane in enumerate(panes):
+        label = get_pane_label(pane) + get_pane_follow_status(pane)
+        screen.addstr(row, pane["x"], common.truncate_string(
+            label, pane["wrap_width"]).ljust(pane["wrap_width"]),
+            highlight=i == selected_pane_index)
+
+
+def draw_process_log():
+    global visible_lines_num
+    layout_panes()
     visible_lines_num = screen.height - screen.current_draw_row_num
     # subtract the keybindings help rows
     visible_lines_num -= 2
 
-    start_index = max(0, len(formatted_output_lines) - visible_lines_num)
-    truncated_formatted_output_lines = formatted_output_lines[start_index:]
+    start_row = screen.current_draw_row_num
+    if len(panes) > 1:
+        draw_pane_labels()
+        visible_lines_num -= 1
+
+    for pane in panes:
+        draw_pane(pane, screen.current_draw_row_num)
+
+    for pane in panes[1:]:
+        screen.vline(start_row, pane["x"] - 1, screen.current_draw_row_num +
+                     visible_lines_num - start_row)
+
+    for _ in range(visible_lines_num):
+        screen.get_and_inc_current_draw_row_num()
+
+
+def draw_search_matches(row, x, line):
+    # matches are found again in the rows on the screen, so one that's
+    # wrapped is highlighted in parts
+    for match in search_regex.finditer(line):
+        if match.end() > match.start():
+            screen.addstr(row, x + match.start(), match.group(), highlight=True)
+
+
+def get_search_status():
+    pane = get_selected_pane()
+    search_matches = pane["search_matches"]
+    current_search_match = pane["current_search_match"]
+    if search_error != "":
+        return f"invalid pattern: {search_error}"
+    elif len(search_matches) == 0:
+        return "no matches"
+    elif current_search_match is None or current_search_match < search_matches[0]:
+        return f"{len(search_matches)} matches"
+
+    index = bisect.bisect_left(search_matches, current_search_match)
+
+    return f"match {index + 1} of {len(search_matches)}"
 
-    while len(truncated_formatted_output_lines) < visible_lines_num:
-        truncated_formatted_output_lines.append("")
 
-    for line in truncated_formatted_output_lines:
-        screen.addstr(
-            screen.get_and_inc_current_draw_row_num(), 0, line)
+def draw_search():
+    row = screen.get_and_inc_current_draw_row_num()
+    screen.add_blank_line(row)
+    if editing_search:
+        line = f"Search: {search_input}_"
+    elif search_pattern != "":
+        line = f"Search: {search_pattern}  ({get_search_status()})"
+    else:
+        return
+
+    screen.addstr(row, 0, common.truncate_string(line, screen.width - 1))
+
+
+def get_follow_status():
+    if not follow:
+        return ""
+    elif not is_following():
+        return " [paused]"
+
+    return f" [following every {follow_interval:g}s]"
+
+
+def get_pane_follow_status(pane):
+    if follow and pane["scroll_offset"] > 0:
+        return " [paused]"
+
+    return ""
+
+
+def get_process_label(cursor):
+    if cursor["endpoint"] is None:
+        return cursor["name"]
+
+    return f"{transport.get_endpoint_label(cursor['endpoint'])} {cursor['name']}"
+
+
+def get_pane_label(pane):
+    return ", ".join(f"{get_process_label(cursor)} {cursor['log_source']}"
+                     for cursor in pane["cursors"])
 
 
 def draw_header():
-    page.draw_title(f"{PAGE_TITLE} {process_name} {log_source}")
+    page.draw_title(
+        f"{PAGE_TITLE} {', '.join(get_pane_label(pane) for pane in panes)}{get_follow_status()}")
     page.draw_buttons()
+    draw_search()
 
 
 def draw():
     screen.reset_current_draw_row_num()
     draw_header()
 
-    screen.hline(screen.get_and_inc_current_draw_row_num(),
-                 0, curses.ACS_HLINE, screen.width)
+    screen.hline(screen.get_and_inc_current_draw_row_num(), 0, screen.width)
 
     draw_process_log()
-    page.draw_keybindings_help()
+    if len(panes) > 1:
+        page.draw_keybindings_help(SEARCH_HELP + PANES_HELP)
+    else:
+        page.draw_keybindings_help(SEARCH_HELP)
+
     screen.refresh()
 
 
 KEYBINDINGS = {
     keys.RIGHT: handle_input_key_right,
     keys.LEFT: handle_input_key_left,
+    keys.UP: handle_input_key_up,
+    keys.DOWN: handle_input_key_down,
+    keys.PAGE_UP: handle_input_key_page_up,
+    keys.PAGE_DOWN: handle_input_key_page_down,
+    keys.TAB: handle_input_key_tab,
     keys.ENTER: handle_input_key_enter,
+    keys.SLASH: handle_input_key_slash,
+    keys.N: handle_input_key_n,
+    keys.SHIFT_N: handle_input_key_shift_n,
 }
 
 
@@ -126,18 +771,34 @@ def init():
     page.init(PAGE_BUTTONS, PAGE_BUTTON_REFRESH, KEYBINDINGS)
 
 
-def enter(pname, logsrc):
-    global process_name, log_source
-    process_name = pname
-    log_source = logsrc
+async def enter(tails, merge=False):
+    # tails are (name, log source, endpoint) of the logs to show, side by
+    # side, or with merge, interleaved in one pane
+    global refresh_task, follow_task, follow_wakeup, fetch_lock, follow_interval, \
+        editing_search
+    editing_search = False
+    set_search("")
+    set_tails(tails, merge)
+    follow_interval = config.TAIL_FOLLOW_INTERVAL
+    follow_wakeup = asyncio.Event()
+    fetch_lock = asyncio.Lock()
 
     init()
     refresh()
-
-    while not page.exit:
-        if screen.handle_window_resize():
-            refresh()
-
-        draw()
-        page.handle_input()
-        time.sleep(0.01)
+    follow_task = eventloop.spawn(follow_process_log())
+
+    try:
+        while not page.exit:
+            raise_task_errors()
+
+            if screen.handle_window_resize():
+                refresh()
+
+            draw()
+            await eventloop.wait_for_redraw()
+            await page.handle_input()
+    finally:
+        refresh_task.cancel()
+        follow_task.cancel()
+        refresh_task = None
+        follow_task = None
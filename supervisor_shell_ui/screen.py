@@ -20,16 +20,49 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 LICENSE HEADER STOP"""
+import os
+import sys
+import time
 import curses
 
 MIN_WIDTH = 110
 MIN_HEIGHT = 20
 
+# cells of the back buffer that hold a horizontal or vertical line, the
+# curses characters they're drawn with, and the attribute of cells when
+# highlighted or not
+HLINE = "\0"
+VLINE = "\1"
+LINE_CELLS = {
+    HLINE: "ACS_HLINE",
+    VLINE: "ACS_VLINE",
+}
+ATTR_NORMAL = " "
+ATTR_HIGHLIGHT = "R"
+
 stdscr = None
 height = 0
 width = 0
 current_draw_row_num = 0
 
+# pages draw into the back buffer, and a frame writes the cells of it that
+# differ from what the terminal shows, the front buffer. Rows are strings
+# of the screen's width with a string of attributes alongside, and only
+# the rows drawn into since the last frame are compared.
+back_rows = []
+back_attrs = []
+front_rows = []
+front_attrs = []
+damaged_rows = set()
+# frames that wrote anything, the time they took and an estimate of the
+# bytes they sent to the terminal: the cells written plus a cursor move
+# and attribute switch per span of them
+render_stats = {
+    "frames": 0,
+    "frame_time": 0.0,
+    "bytes": 0,
+}
+
 
 def __must_have_proper_dimensions():
     if width < MIN_WIDTH:
@@ -60,12 +93,23 @@ def _must_have_stdscr(fn):
     return wrapper
 
 
+def reset_buffers():
+    # the terminal is blank after initscr and clear
+    global back_rows, back_attrs, front_rows, front_attrs
+    back_rows = [" " * width for _ in range(height)]
+    back_attrs = [ATTR_NORMAL * width for _ in range(height)]
+    front_rows = list(back_rows)
+    front_attrs = list(back_attrs)
+    damaged_rows.clear()
+
+
 def init(scr):
     global stdscr, height, width
     stdscr = scr
     height, width = stdscr.getmaxyx()
     __must_have_proper_dimensions()
     curses.start_color()
+    reset_buffers()
 
 
 def get_and_inc_current_draw_row_num():
@@ -87,34 +131,55 @@ def reset_current_draw_row_num():
 @_must_have_proper_dimensions
 def handle_window_resize():
     global height, width
-    if curses.is_term_resized(height, width):
+    # SIGWINCH is handled by the event loop instead of curses, so curses is
+    # told about the new size here
+    new_width, new_height = os.get_terminal_size(sys.__stdout__.fileno())
+    if curses.is_term_resized(new_height, new_width):
+        curses.resizeterm(new_height, new_width)
         height, width = stdscr.getmaxyx()
+        # what the terminal shows is unknown after a resize, so it's cleared
+        # for real
         stdscr.clear()
+        reset_buffers()
 
         return True
 
     return False
 
 
-@_must_have_stdscr
-def addstr(row, start_pos, label, highlight=False):
-    if highlight:
-        stdscr.attron(curses.A_REVERSE)
-        stdscr.addstr(row, start_pos, label)
-        stdscr.attroff(curses.A_REVERSE)
-
+def put(row, start_pos, cells, attr):
+    # cells past the edges of the screen are cut off
+    if row < 0 or row >= height or start_pos >= width:
         return
 
-    stdscr.addstr(row, start_pos, label)
+    if start_pos < 0:
+        cells = cells[-start_pos:]
+        start_pos = 0
+
+    cells = cells[:width - start_pos]
+    end_pos = start_pos + len(cells)
+    line = back_rows[row]
+    back_rows[row] = line[:start_pos] + cells + line[end_pos:]
+    attrs = back_attrs[row]
+    back_attrs[row] = attrs[:start_pos] + attr * len(cells) + attrs[end_pos:]
+    damaged_rows.add(row)
+
+
+def addstr(row, start_pos, label, highlight=False):
+    put(row, start_pos, label, ATTR_HIGHLIGHT if highlight else ATTR_NORMAL)
 
 
 def add_blank_line(row):
     return addstr(row, 0, " " * width)
 
 
-@_must_have_stdscr
-def hline(*args, **kwargs):
-    stdscr.hline(*args, **kwargs)
+def hline(row, start_pos, length):
+    put(row, start_pos, HLINE * length, ATTR_NORMAL)
+
+
+def vline(row, start_pos, length):
+    for line_row in range(row, row + length):
+        put(line_row, start_pos, VLINE, ATTR_NORMAL)
 
 
 @_must_have_stdscr
@@ -122,11 +187,122 @@ def getch(*args, **kwargs):
     return stdscr.getch(*args, **kwargs)
 
 
-@_must_have_stdscr
-def refresh(*args, **kwargs):
-    stdscr.refresh(*args, **kwargs)
+def get_damaged_span(row):
+    # the first and last cell of the part of the row that differs from the
+    # terminal, or None if none of it does
+    line, attrs = back_rows[row], back_attrs[row]
+    front_line, front_attr = front_rows[row], front_attrs[row]
+    if line == front_line and attrs == front_attr:
+        return None
+
+    # binary searches for the longest equal start and end of the row, so
+    # wide rows take a few compares of slices rather than one per cell
+    first, low = 0, width
+    while low - first > 1:
+        middle = (first + low) // 2
+        if line[:middle] == front_line[:middle] and attrs[:middle] == front_attr[:middle]:
+            first = middle
+        else:
+            low = middle
+
+    last, high = first, width
+    while high - last > 1:
+        middle = (last + high) // 2
+        if line[middle:] == front_line[middle:] and attrs[middle:] == front_attr[middle:]:
+            high = middle
+        else:
+            last = middle
+
+    return first, last
+
+
+def write_cells(row, start_pos, cells, attr):
+    if cells[0] in LINE_CELLS:
+        # ACS_* only exist once curses is initialized
+        stdscr.hline(row, start_pos, getattr(curses, LINE_CELLS[cells[0]]), len(cells))
+
+        return
+
+    try:
+        if attr == ATTR_HIGHLIGHT:
+            stdscr.addstr(row, start_pos, cells, curses.A_REVERSE)
+        else:
+            stdscr.addstr(row, start_pos, cells)
+    except curses.error:
+        # writing the bottom right cell moves the cursor off the screen,
+        # which curses reports after writing it
+        if row != height - 1 or start_pos + len(cells) != width:
+            raise
+
+
+def get_cell_kind(cell):
+    # lines are written a kind at a time, and text all together
+    return cell if cell in LINE_CELLS else ""
+
+
+def write_span(row, first, last):
+    # the span is written in runs of cells with the same attribute and of
+    # line or text
+    sent_bytes = 0
+    line, attrs = back_rows[row], back_attrs[row]
+    cells = line[first:last + 1]
+    # mostly it's a single run of text
+    if HLINE not in cells and VLINE not in cells and attrs.count(attrs[first], first, last + 1) == len(cells):
+        write_cells(row, first, cells, attrs[first])
+
+        return len(cells.encode("utf-8")) + 8
+
+    run_start = first
+    for i in range(first + 1, last + 2):
+        if i <= last and attrs[i] == attrs[run_start] and \
+                get_cell_kind(line[i]) == get_cell_kind(line[run_start]):
+            continue
+
+        cells = line[run_start:i]
+        write_cells(row, run_start, cells, attrs[run_start])
+        sent_bytes += len(cells.encode("utf-8")) + 8
+        run_start = i
+
+    return sent_bytes
 
 
 @_must_have_stdscr
-def clear(*args, **kwargs):
-    stdscr.clear(*args, **kwargs)
+def refresh():
+    start_time = time.perf_counter()
+    sent_bytes = 0
+    for row in damaged_rows:
+        span = get_damaged_span(row)
+        if span is None:
+            continue
+
+        sent_bytes += write_span(row, *span)
+        front_rows[row] = back_rows[row]
+        front_attrs[row] = back_attrs[row]
+
+    damaged_rows.clear()
+    if sent_bytes == 0:
+        return
+
+    stdscr.noutrefresh()
+    curses.doupdate()
+
+    render_stats["frames"] += 1
+    render_stats["frame_time"] += time.perf_counter() - start_time
+    render_stats["bytes"] += sent_bytes
+
+
+def clear():
+    # blanks the back buffer; the cells that were drawn before are blanked
+    # on the terminal with the next frame, without clearing it, which
+    # flickers
+    for row in range(height):
+        put(row, 0, " " * width, ATTR_NORMAL)
+
+
+def get_render_stats_label():
+    frames = render_stats["frames"]
+    if frames == 0:
+        return "no frames"
+
+    return f"{frames} frames, {render_stats['frame_time'] * 1e3 / frames:.2f} ms " \
+        f"and {render_stats['bytes'] / frames:.0f} B per frame"
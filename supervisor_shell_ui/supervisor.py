@@ -20,141 +20,812 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 LICENSE HEADER STOP"""
-import requests_unixsocket
-import xml.etree.ElementTree as ET
-import socket
-from urllib.parse import quote
-from supervisor_shell_ui import config
+import os
+import gzip
+import time
+import threading
+
+from datetime import datetime
 
-session = requests_unixsocket.Session()
+from supervisor_shell_ui import common
+from supervisor_shell_ui import config
+from supervisor_shell_ui import rpc
+from supervisor_shell_ui import transport
 
 LOG_SOURCE_STDOUT = "stdout"
 LOG_SOURCE_STDERR = "stderr"
 
+TAIL_LOG_RPC_METHODS = {
+    LOG_SOURCE_STDOUT: "supervisor.tailProcessStdoutLog",
+    LOG_SOURCE_STDERR: "supervisor.tailProcessStderrLog",
+}
+
+READ_LOG_RPC_METHODS = {
+    LOG_SOURCE_STDOUT: "supervisor.readProcessStdoutLog",
+    LOG_SOURCE_STDERR: "supervisor.readProcessStderrLog",
+}
+
+# seconds between the progress reports of a log export
+LOG_EXPORT_PROGRESS_INTERVAL = 0.5
+# the longest UTF-8 character is cut short by at most this many bytes
+MAX_UTF8_CUT = 3
+
+# the status of a process in the results of the group and *All calls
+FAULT_SUCCESS = 80
+FAULT_NOT_RUNNING = 70
+
+# what supervisord answers when a read of a log cuts a character in two
+FAULT_FAILED = 30
+
+# state of a group whose processes aren't all in the same one
+PROCESS_GROUP_STATE_MIXED = "MIXED"
+
+PROCESS_SORT_NAME = "name"
+PROCESS_SORT_STATE = "state"
+PROCESS_SORT_PID = "pid"
+PROCESS_SORT_UPTIME = "uptime"
+PROCESS_SORT_EXIT = "exit"
+PROCESS_SORTS = [
+    PROCESS_SORT_NAME,
+    PROCESS_SORT_STATE,
+    PROCESS_SORT_PID,
+    PROCESS_SORT_UPTIME,
+    PROCESS_SORT_EXIT,
+]
+
+# the states that need looking at come first when sorting by state
+PROCESS_STATE_SORT_ORDER = {
+    "FATAL": 0,
+    "BACKOFF": 1,
+    "EXITED": 2,
+    "UNKNOWN": 3,
+    "STARTING": 4,
+    "STOPPING": 5,
+    "STOPPED": 6,
+    "RUNNING": 7,
+}
+
+RESTART_STRATEGY_PARALLEL = "parallel"
+RESTART_STRATEGY_ROLLING = "rolling"
+RESTART_STRATEGY_GROUP = "group"
+RESTART_STRATEGIES = [
+    RESTART_STRATEGY_PARALLEL,
+    RESTART_STRATEGY_ROLLING,
+    RESTART_STRATEGY_GROUP,
+]
+
+# seconds between checks on a restarting batch
+RESTART_POLL_INTERVAL = 0.5
+STOPPED_PROCESS_STATES = ["STOPPED", "EXITED", "FATAL"]
+FAILED_PROCESS_STATES = ["EXITED", "FATAL"]
+# states in which getProcessInfo reports a pid other than 0
+LIVE_PROCESS_STATES = ["STARTING", "RUNNING", "STOPPING"]
+
+# fields of a getProcessInfo struct, and the ones the UI adds to it
+PROCESS_INFO_FIELDS = (
+    "name",
+    "group",
+    "description",
+    "start",
+    "stop",
+    "now",
+    "state",
+    "statename",
+    "spawnerr",
+    "exitstatus",
+    "logfile",
+    "stdout_logfile",
+    "stderr_logfile",
+    "pid",
+    "endpoint",
+    "host",
+)
+PROCESS_INFO_FIELD_SET = frozenset(PROCESS_INFO_FIELDS)
+
+# getAllProcessInfo and getProcessInfo results, by endpoint and call, so
+# that going back and forth between pages doesn't fetch them again. Every
+# call that changes a process clears the cache, and bumps the generation so
+# that fetches that were already underway don't put stale results back.
+process_info_cache = {}
+process_info_cache_generation = 0
+process_info_cache_lock = threading.Lock()
+
+
+class ProcessInfo:
+    # one is kept for every process on the screen, so the fields go in slots
+    # instead of a dict per process. It's read and written like the struct
+    # it's made from, and the item access is the attribute access itself,
+    # so drawing a row costs no more than with a dict. Fields supervisord
+    # adds in the future are dropped.
+    __slots__ = PROCESS_INFO_FIELDS
+
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    def __init__(self, info):
+        self.update(info)
+
+    def __contains__(self, field):
+        return field in PROCESS_INFO_FIELD_SET and hasattr(self, field)
+
+    def get(self, field, default=None):
+        if field not in PROCESS_INFO_FIELD_SET:
+            return default
+
+        return getattr(self, field, default)
+
+    def keys(self):
+        return [field for field in PROCESS_INFO_FIELDS if hasattr(self, field)]
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in self.keys()]
+
+    def update(self, info):
+        for field, value in info.items():
+            if field in PROCESS_INFO_FIELD_SET:
+                setattr(self, field, value)
+
+
+def must_have_rpc_succeeded(status, text):
+    if status == 401:
+        raise Exception(
+            "Supervisor refused the credentials, check SUPERVISOR_USERNAME and SUPERVISOR_PASSWORD")
 
-def socket_exists(sock_path):
-    try:
-        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        client.connect(sock_path)
-        client.close()
-        return True
-    except Exception as e:
-        print(f"Couldn't connect to socket: {e}")
-        return False
+    if status != 200:
+        raise Exception(f"RPC call failed: {text}")
 
 
-def exec_rpc(method_name, *params):
-    if not socket_exists(config.SUPERVISOR_SOCK_PATH):
-        raise Exception(
-            f"Supervisor socket not found: {config.SUPERVISOR_SOCK_PATH}")
+def get_process_info_cache_key(method_name, params, endpoint):
+    return (transport.get_endpoint(endpoint), method_name) + tuple(params)
+
+
+def get_process_info_cache_generation():
+    return process_info_cache_generation
+
+
+def copy_process_info(result):
+    # the process dicts get updated by whoever fetched them
+    if isinstance(result, list):
+        return [dict(process) for process in result]
+
+    return dict(result)
+
+
+def get_cached_process_info(key):
+    with process_info_cache_lock:
+        entry = process_info_cache.get(key)
+
+    if entry is None or time.monotonic() - entry["time"] > config.PROCESS_INFO_CACHE_TTL:
+        return None
+
+    return copy_process_info(entry["result"])
 
-    param_str = "".join(
-        [f"<param><value><string>{p}</string></value></param>" for p in params])
 
-    data = f"""<?xml version="1.0"?>
-<methodCall>
-    <methodName>{method_name}</methodName>
-    <params>
-        {param_str}
-    </params>
-</methodCall>
-"""
+def cache_process_info(key, result, generation):
+    with process_info_cache_lock:
+        if generation == process_info_cache_generation:
+            process_info_cache[key] = {
+                "time": time.monotonic(),
+                "result": copy_process_info(result),
+            }
 
-    url = f'http+unix://{quote(config.SUPERVISOR_SOCK_PATH, safe="")}/RPC2'
-    resp = session.post(url, data=data)
-    if resp.status_code != 200:
-        raise Exception(f"RPC call failed: {resp.text}")
 
-    return resp.text
+def invalidate_process_info_cache():
+    global process_info_cache_generation
+    with process_info_cache_lock:
+        process_info_cache.clear()
+        process_info_cache_generation += 1
 
 
-def parse_process_info(struct_element):
-    process = {}
-    for member in struct_element.findall("member"):
-        name = member.find("name").text
-        value_type = list(member.find("value"))[0].tag
-        val = member.find(f"value/{value_type}").text
-        process[name] = int(val) if value_type == "int" else val
+def invalidates_process_info(fn):
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            invalidate_process_info_cache()
 
+    return wrapper
+
+
+def exec_rpc(method_name, *params, endpoint=None):
+    decoder = rpc.Decoder()
+    status, text = transport.post(
+        rpc.encode_call(method_name, params), decoder.feed, endpoint)
+    must_have_rpc_succeeded(status, text)
+
+    return decoder.close()
+
+
+def multicall(calls):
+    return exec_rpc("system.multicall", [
+        {"methodName": method_name, "params": list(params)}
+        for method_name, params in calls])
+
+
+def is_fault(result):
+    return isinstance(result, dict) and "faultCode" in result
+
+
+def get_multicall_faults(results, ignored_fault_codes=()):
+    return [result["faultString"] for result in results
+            if is_fault(result) and result["faultCode"] not in ignored_fault_codes]
+
+
+def get_namespec(group, name):
+    if group == name:
+        return name
+
+    return f"{group}:{name}"
+
+
+def get_process_namespec(process):
+    return get_namespec(process["group"], process["name"])
+
+
+def parse_process_info(process):
+    process = ProcessInfo(process)
     process["state"] = process["statename"]
 
     return process
 
 
-def parse_process_list_info(xml_data):
-    processes = []
-    for value in xml_data.findall(".//array/data/value/struct"):
-        process = parse_process_info(value)
-        processes.append(process)
+def parse_process_list_info(processes):
+    return [parse_process_info(process) for process in processes]
+
+
+def apply_process_state_event(process, event):
+    # keeps a process record current from a PROCESS_STATE event, with the
+    # description worded the way supervisord words it
+    process["state"] = process["statename"] = event["state"]
+    # the events of a process that's gone still carry the pid it had
+    if event["state"] not in LIVE_PROCESS_STATES:
+        process["pid"] = 0
+    elif "pid" in event:
+        process["pid"] = int(event["pid"])
+
+    if event["state"] == "RUNNING":
+        process["description"] = f"pid {process['pid']}, uptime 0:00:00"
+    elif event["state"] in ["STOPPED", "EXITED"]:
+        process["description"] = time.strftime("%b %d %I:%M %p")
+    else:
+        process["description"] = ""
+
+    return process
+
+
+def get_group_namespec(group):
+    return f"{group}:*"
 
-    return processes
 
+def get_endpoint_key(process, namespec):
+    # processes of different hosts may have the same namespec
+    if "endpoint" in process:
+        return f"{process['endpoint']} {namespec}"
 
-def get_processes():
-    raw_data = exec_rpc("supervisor.getAllProcessInfo")
-    root = ET.fromstring(raw_data)
-    processes = parse_process_list_info(root)
-    processes = sorted(processes, key=lambda process: process["name"])
+    return namespec
 
-    return processes
 
+def get_process_key(process):
+    if is_process_group(process):
+        return get_process_group_key(process)
 
-def get_process(name):
-    raw_data = exec_rpc("supervisor.getProcessInfo", name)
-    root = ET.fromstring(raw_data)
-    process = parse_process_info(root.find(".//struct"))
+    return get_endpoint_key(process, get_process_namespec(process))
 
-    return process
 
+def get_process_group_key(process):
+    return get_endpoint_key(process, get_group_namespec(process["group"]))
 
-def tail_process_log(name, log_source, byte_count):
-    rpc_method = "supervisor.tailProcessStdoutLog"
-    if log_source == LOG_SOURCE_STDERR:
-        rpc_method = "supervisor.tailProcessStderrLog"
 
-    raw_data = exec_rpc(rpc_method, name, 0, byte_count)
-    root = ET.fromstring(raw_data)
-    log_data = root.find(".//array/data/value/string").text
+def is_process_group(process):
+    return "processes" in process
+
+
+def is_grouped_process(process):
+    # programs without a [group] section are a group of one by the same name
+    return process["group"] != process["name"]
+
+
+def get_process_groups(processes):
+    # groups of the processes by group key, in the order they come in
+    groups = {}
+    for process in processes:
+        groups.setdefault(get_process_group_key(process), []).append(process)
+
+    return list(groups.values())
+
+
+def update_process_group(group):
+    # the state of a group is the one its processes are all in, if they are.
+    # The count per state is kept so the group's buttons can be picked
+    # without going through its processes again.
+    states = {}
+    for process in group["processes"]:
+        states[process["state"]] = states.get(process["state"], 0) + 1
+
+    group["state_counts"] = states
+
+    if len(states) == 1:
+        group["state"] = list(states)[0]
+    else:
+        group["state"] = PROCESS_GROUP_STATE_MIXED
+
+    group["description"] = ", ".join(
+        [f"{count} {state}" for state, count in sorted(states.items())])
+
+    return group
+
+
+def get_process_group(processes):
+    process = processes[0]
+    group = {
+        "group": process["group"],
+        "name": process["group"],
+        "processes": processes,
+    }
+    if "endpoint" in process:
+        group["endpoint"] = process["endpoint"]
+        group["host"] = process["host"]
+
+    return update_process_group(group)
+
+
+def get_process_snapshot(processes):
+    return {get_process_key(process): process for process in processes}
+
+
+def diff_process_snapshots(old_snapshot, new_snapshot):
+    # "now" is the server time and differs on every call, so it's left out
+    diff = {
+        "added": [key for key in new_snapshot if key not in old_snapshot],
+        "removed": [key for key in old_snapshot if key not in new_snapshot],
+        "changed": {},
+    }
+
+    for key, process in new_snapshot.items():
+        old_process = old_snapshot.get(key)
+        if old_process is None:
+            continue
+
+        fields = [field for field, value in process.items()
+                  if field != "now" and old_process.get(field) != value]
+        if len(fields) > 0:
+            diff["changed"][key] = fields
+
+    return diff
+
+
+def get_process_sort_key(process, sort=PROCESS_SORT_NAME):
+    # processes that sort the same are in name order, with the processes of
+    # a group kept together, and those of a host too in fleet mode
+    key = (process["group"], process["name"])
+    if "host" in process:
+        key = (process["host"],) + key
+
+    if sort == PROCESS_SORT_STATE:
+        return (PROCESS_STATE_SORT_ORDER.get(process["state"], 3),) + key
+
+    if sort == PROCESS_SORT_PID:
+        # processes that aren't running have no pid and go last
+        return (process["pid"] == 0, process["pid"]) + key
 
-    if log_data is None:
+    if sort == PROCESS_SORT_UPTIME:
+        # shortest uptime first, i.e. the latest start of a running process
+        return (process["state"] != "RUNNING", -process["start"]) + key
+
+    if sort == PROCESS_SORT_EXIT:
+        # processes that exited with an error first, the latest one on top
+        return (process["exitstatus"] == 0, -process["stop"]) + key
+
+    return key
+
+
+def sort_processes(processes, sort=PROCESS_SORT_NAME):
+    return sorted(processes, key=lambda process: get_process_sort_key(process, sort))
+
+
+def must_have_log_data(name, log_source, log_data):
+    if log_data == "":
         raise Exception(f'Process {name} has no {log_source} log')
 
+
+def parse_tail_process_log(name, log_source, result):
+    log_data, _, _ = result
+    must_have_log_data(name, log_source, log_data)
+
     return log_data
 
 
-def restart_all():
-    processes = get_processes()
-    for process in processes:
-        restart_process(process["name"])
+def get_tail_cursor(name, log_source, byte_count, endpoint=None):
+    return {
+        "endpoint": endpoint,
+        "name": name,
+        "log_source": log_source,
+        "byte_count": byte_count,
+        # None until the first read, which takes the end of the log
+        "offset": None,
+        "data": "",
+        # what the last read added to data, and how many times data had to
+        # start over instead of being added to
+        "new_data": "",
+        "restarts": 0,
+        # how many bytes short of byte_count the end of the log is read,
+        # to start it on a whole character
+        "cut": 0,
+    }
+
+
+def reset_tail_cursor(cursor):
+    cursor["offset"] = None
+    cursor["data"] = ""
+    cursor["new_data"] = ""
+    cursor["restarts"] += 1
+
+
+def get_tail_cursor_calls(cursor):
+    # a tail of no bytes, which only tells how long the log is, and a read
+    # of what was logged past the offset. tailProcessLog itself can't be
+    # used for the latter, as it returns the last byte_count bytes of the
+    # log whatever the offset.
+    name = cursor["name"]
+    length = cursor["byte_count"] - cursor["cut"]
+    if cursor["offset"] is None:
+        read_params = [name, -length, 0]
+    else:
+        read_params = [name, cursor["offset"], length]
+
+    return [
+        (TAIL_LOG_RPC_METHODS[cursor["log_source"]], [name, 0, 0]),
+        (READ_LOG_RPC_METHODS[cursor["log_source"]], read_params),
+    ]
+
+
+def must_not_be_tail_cursor_fault(cursor, result):
+    # a read of a multicall fails on its own
+    if is_fault(result):
+        raise Exception(f"Process {cursor['name']} {cursor['log_source']} log: "
+                        f"{result['faultString']}")
+
+
+def update_tail_cursor(cursor, results):
+    # takes the results of the calls of get_tail_cursor_calls and returns
+    # False if the cursor has to be read again: when the log shrank since
+    # the last read, i.e. it was rotated or cleared, or grew by more than
+    # byte_count, the cursor starts over from the end of the log. A log that
+    # was rotated and grew past the old offset between two reads can't be
+    # told apart from one that just grew.
+    tail_result, log_data = results
+    must_not_be_tail_cursor_fault(cursor, tail_result)
+    _, size, _ = tail_result
+    offset = cursor["offset"]
+    if offset is not None and not offset <= size <= offset + cursor["byte_count"]:
+        reset_tail_cursor(cursor)
+
+        return False
+
+    if is_fault(log_data):
+        if log_data["faultCode"] != FAULT_FAILED:
+            must_not_be_tail_cursor_fault(cursor, log_data)
+
+        if offset is None and cursor["cut"] < MAX_UTF8_CUT:
+            cursor["cut"] += 1
+
+            return False
+
+        # the last character is only partly logged yet, and the next read
+        # gets all of it
+        cursor["cut"] = 0
+        cursor["new_data"] = ""
+
+        return True
+
+    cursor["cut"] = 0
+    cursor["data"] = (cursor["data"] + log_data)[-cursor["byte_count"]:]
+    cursor["new_data"] = log_data
+    cursor["offset"] = size
+
+    return True
+
+
+def exec_process_info_rpc(method_name, *params, endpoint=None, cached=False):
+    # with cached, a result that's younger than PROCESS_INFO_CACHE_TTL
+    # seconds may be returned instead of calling supervisord
+    key = get_process_info_cache_key(method_name, params, endpoint)
+    if cached:
+        result = get_cached_process_info(key)
+        if result is not None:
+            return result
+
+    generation = get_process_info_cache_generation()
+    result = exec_rpc(method_name, *params, endpoint=endpoint)
+    cache_process_info(key, result, generation)
+
+    return result
+
+
+def get_processes(cached=False):
+    return sort_processes(parse_process_list_info(
+        exec_process_info_rpc("supervisor.getAllProcessInfo", cached=cached)))
+
+
+def get_process(name, cached=False):
+    return parse_process_info(exec_process_info_rpc(
+        "supervisor.getProcessInfo", name, cached=cached))
+
+
+def tail_process_log(name, log_source, byte_count):
+    return parse_tail_process_log(name, log_source, exec_rpc(
+        TAIL_LOG_RPC_METHODS[log_source], name, 0, byte_count))
+
+
+def get_process_log_size(name, log_source):
+    # a tail of no bytes only tells how long the log is
+    _, size, _ = exec_rpc(TAIL_LOG_RPC_METHODS[log_source], name, 0, 0)
+
+    return size
+
+
+def read_process_log_chunk(name, log_source, offset, length):
+    # supervisord decodes what it read and fails the read with FAILED if the
+    # last character was cut off, so the chunk is read again shorter until
+    # it ends on a whole one. The read goes through a multicall, where that
+    # failure is a fault like any other instead of an HTTP 500, and other
+    # faults are raised right away. Returns the chunk as bytes and the
+    # bytes of the log it covers, which is more than the chunk when the
+    # XML parser turned CRLF line ends into LF ones.
+    rpc_method = READ_LOG_RPC_METHODS[log_source]
+    for cut in range(min(MAX_UTF8_CUT, length - 1) + 1):
+        result, = multicall([(rpc_method, [name, offset, length - cut])])
+        if not is_fault(result):
+            return result.encode("utf-8"), length - cut
+
+        if result["faultCode"] != FAULT_FAILED or cut == min(MAX_UTF8_CUT, length - 1):
+            raise Exception(result["faultString"])
+
+
+def get_log_export_path(name, log_source, host=None, compress=False):
+    # a file per export, named after the log and when it was taken
+    file_name = f"{name.replace(':', '-')}-{log_source}-{datetime.now():%Y%m%d-%H%M%S}.log"
+    if host is not None:
+        file_name = f"{host.replace(':', '-')}-{file_name}"
+
+    if compress:
+        file_name += ".gz"
+
+    return os.path.join(config.LOG_EXPORT_DIR, file_name)
+
+
+def open_log_export(path, compress):
+    if compress:
+        # zlib's default level, most of the gain of 9 at a fraction of the time
+        return gzip.open(path, "wb", compresslevel=6)
+
+    return open(path, "wb")
+
+
+def export_process_log(name, log_source, path, compress=False, on_progress=None):
+    # writes the log as it was when the export started to path a chunk at a
+    # time, so an export takes the same memory whatever the size of the
+    # log. on_progress is called with the bytes exported, the size of the
+    # log and the seconds taken every LOG_EXPORT_PROGRESS_INTERVAL seconds,
+    # and may raise to stop the export, which removes the file. Carriage
+    # returns are lost, as the XML parser turns CRLF and CR into LF.
+    size = get_process_log_size(name, log_source)
+    if size == 0:
+        return f"Process {name} has no {log_source} log to export."
+
+    start_time = time.monotonic()
+    progress_time = start_time
+    exported_size = 0
+    # a chunk that ends in a line feed may have ended on the CR of a CRLF,
+    # which the next chunk would start with another line feed for, so the
+    # next chunk is read from that last byte again and the line feed it
+    # then starts with is dropped
+    overlap = 0
+    try:
+        with open_log_export(path, compress) as f:
+            while exported_size < size:
+                chunk, read_size = read_process_log_chunk(
+                    name, log_source, exported_size - overlap,
+                    min(config.LOG_EXPORT_CHUNK_SIZE, size - exported_size) + overlap)
+                # the log was rotated or cleared since the export started
+                if len(chunk) <= overlap:
+                    break
+
+                f.write(chunk[overlap:])
+                exported_size += read_size - overlap
+                overlap = 1 if chunk.endswith(b"\n") else 0
+                if on_progress is not None and \
+                        time.monotonic() - progress_time >= LOG_EXPORT_PROGRESS_INTERVAL:
+                    progress_time = time.monotonic()
+                    on_progress(exported_size, size, progress_time - start_time)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+
+        raise
+
+    elapsed_time = max(time.monotonic() - start_time, 1e-6)
+
+    return (f"Exported {name} {log_source} log to {path}: {common.format_size(exported_size)} "
+            f"in {elapsed_time:.1f}s, {common.format_size(exported_size / elapsed_time)}/s.")
+
+
+def restart_processes(names):
+    # stopping a process that isn't running is not an error when restarting
+    calls = [("supervisor.stopProcess", [name]) for name in names]
+    calls += [("supervisor.startProcess", [name]) for name in names]
+
+    return get_multicall_faults(multicall(calls), [FAULT_NOT_RUNNING])
 
-    return "Restarted all processes."
 
+def get_process_group_faults(results):
+    # faults of the calls themselves and of the processes they went through
+    faults = get_multicall_faults(results)
+    for result in results:
+        if is_fault(result):
+            continue
+
+        faults += [f"{get_namespec(status['group'], status['name'])}: {status['description']}"
+                   for status in result if status["status"] != FAULT_SUCCESS]
 
+    return faults
+
+
+def split_batch(namespecs, size):
+    # a size of 0 means no limit
+    if size <= 0:
+        return [namespecs] if len(namespecs) > 0 else []
+
+    return [namespecs[i:i + size] for i in range(0, len(namespecs), size)]
+
+
+def get_restart_batches(processes, strategy):
+    namespecs = [get_process_namespec(process) for process in processes]
+    if strategy == RESTART_STRATEGY_PARALLEL:
+        return split_batch(namespecs, config.RESTART_CONCURRENCY)
+
+    if strategy == RESTART_STRATEGY_ROLLING:
+        return split_batch(namespecs, config.RESTART_BATCH_SIZE)
+
+    if strategy == RESTART_STRATEGY_GROUP:
+        groups = {}
+        for process in processes:
+            groups.setdefault(process["group"], []).append(
+                get_process_namespec(process))
+
+        return [batch for group_namespecs in groups.values()
+                for batch in split_batch(group_namespecs, config.RESTART_CONCURRENCY)]
+
+    raise Exception(f"Unknown restart strategy: {strategy}")
+
+
+def wait_for_process_states(namespecs, states, timeout):
+    # returns the states of the processes that didn't get to one of states
+    # in time, or that failed to start
+    namespecs = set(namespecs)
+    deadline = time.monotonic() + timeout
+    while True:
+        pending = {}
+        for process in get_processes():
+            namespec = get_process_namespec(process)
+            if namespec in namespecs and process["state"] not in states:
+                pending[namespec] = process["state"]
+
+        failed = [state for state in pending.values()
+                  if state in FAILED_PROCESS_STATES]
+        if len(pending) == 0 or len(failed) > 0 or time.monotonic() >= deadline:
+            return pending
+
+        time.sleep(RESTART_POLL_INTERVAL)
+
+
+def restart_batch(namespecs):
+    # all processes of a batch are stopped and started at once, without
+    # supervisord waiting on each of them in turn, and the batch is done when
+    # they're all RUNNING
+    faults = get_multicall_faults(multicall(
+        [("supervisor.stopProcess", [namespec, False]) for namespec in namespecs]), [FAULT_NOT_RUNNING])
+    pending = wait_for_process_states(
+        namespecs, STOPPED_PROCESS_STATES, config.RESTART_BATCH_TIMEOUT)
+    if len(pending) == 0:
+        faults += get_multicall_faults(multicall(
+            [("supervisor.startProcess", [namespec, False]) for namespec in namespecs]))
+        pending = wait_for_process_states(
+            namespecs, ["RUNNING"], config.RESTART_BATCH_TIMEOUT)
+
+    faults += [f"{namespec} is {state}" for namespec, state in pending.items()]
+
+    return faults
+
+
+@invalidates_process_info
+def restart_all(strategy=None, on_progress=None):
+    # batches are restarted one after another; once one fails the rest are
+    # left alone, so a broken deploy doesn't take down more than a batch.
+    # on_progress is called with the batches done and their number before
+    # each batch, and may raise to stop the restart there.
+    if strategy is None:
+        strategy = config.RESTART_STRATEGY
+
+    batches = get_restart_batches(get_processes(), strategy)
+    for i, batch in enumerate(batches):
+        if on_progress is not None:
+            on_progress(i, len(batches))
+
+        faults = restart_batch(batch)
+        if len(faults) > 0:
+            return "\n".join([
+                f"Restart all ({strategy}) stopped at batch {i + 1} of {len(batches)}:"] + faults)
+
+    if len(batches) == 1:
+        return f"Restarted all processes ({strategy}, 1 batch)."
+
+    return f"Restarted all processes ({strategy}, {len(batches)} batches)."
+
+
+@invalidates_process_info
 def stop_all():
     exec_rpc("supervisor.stopAllProcesses")
 
     return "Stopped all processes."
 
 
+@invalidates_process_info
 def start_process(name):
     exec_rpc("supervisor.startProcess", name)
 
     return f"Started process {name}."
 
 
+@invalidates_process_info
 def stop_process(name):
     exec_rpc("supervisor.stopProcess", name)
 
     return f"Stopped process {name}."
 
 
+@invalidates_process_info
 def restart_process(name):
-    stop_process(name)
-    start_process(name)
+    faults = restart_processes([name])
+    if len(faults) > 0:
+        raise Exception("\n".join(faults))
 
     return f"Restarted process {name}."
 
 
+@invalidates_process_info
+def start_process_group(name):
+    faults = get_process_group_faults(
+        [exec_rpc("supervisor.startProcessGroup", name)])
+    if len(faults) > 0:
+        raise Exception("\n".join(faults))
+
+    return f"Started process group {name}."
+
+
+@invalidates_process_info
+def stop_process_group(name):
+    faults = get_process_group_faults(
+        [exec_rpc("supervisor.stopProcessGroup", name)])
+    if len(faults) > 0:
+        raise Exception("\n".join(faults))
+
+    return f"Stopped process group {name}."
+
+
+@invalidates_process_info
+def restart_process_group(name):
+    faults = get_process_group_faults(multicall([
+        ("supervisor.stopProcessGroup", [name]),
+        ("supervisor.startProcessGroup", [name]),
+    ]))
+    if len(faults) > 0:
+        raise Exception("\n".join(faults))
+
+    return f"Restarted process group {name}."
+
+
+@invalidates_process_info
 def clear_process_log(name):
     exec_rpc("supervisor.clearProcessLogs", name)
 
@@ -0,0 +1,132 @@
+"""LICENSE HEADER START
+
+supervisor-shell-ui
+
+A command-line interface clone of the built-in web interface provided by Supervisor for managing processes.
+
+Copyright (C) 2023 Ciprian Mandache <https://ciprian.51k.eu>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+LICENSE HEADER STOP"""
+import json
+import asyncio
+
+from supervisor_shell_ui import config
+from supervisor_shell_ui import rpc
+from supervisor_shell_ui import supervisor
+from supervisor_shell_ui import transport
+
+
+async def exec_rpc(method_name, *params, endpoint=None):
+    decoder = rpc.Decoder()
+    status, text = await transport.post_async(
+        rpc.encode_call(method_name, params), decoder.feed, endpoint)
+    supervisor.must_have_rpc_succeeded(status, text)
+
+    return decoder.close()
+
+
+async def exec_process_info_rpc(method_name, *params, endpoint=None, cached=False):
+    key = supervisor.get_process_info_cache_key(method_name, params, endpoint)
+    if cached:
+        result = supervisor.get_cached_process_info(key)
+        if result is not None:
+            return result
+
+    generation = supervisor.get_process_info_cache_generation()
+    result = await exec_rpc(method_name, *params, endpoint=endpoint)
+    supervisor.cache_process_info(key, result, generation)
+
+    return result
+
+
+async def get_processes(endpoint=None, cached=False):
+    # unsorted, the process table sorts them itself when they change
+    return supervisor.parse_process_list_info(
+        await exec_process_info_rpc("supervisor.getAllProcessInfo", endpoint=endpoint, cached=cached))
+
+
+async def get_host_processes(endpoint, cached=False):
+    processes = await asyncio.wait_for(
+        get_processes(endpoint, cached), config.FLEET_POLL_TIMEOUT)
+    for process in processes:
+        process["endpoint"] = endpoint
+        process["host"] = transport.get_endpoint_label(endpoint)
+
+    return processes
+
+
+async def get_fleet_processes(endpoints, cached=False):
+    # every host is asked at once and a slow one can hold the poll up for at
+    # most FLEET_POLL_TIMEOUT seconds; returns the processes of the hosts
+    # that answered and an error per endpoint for those that didn't
+    results = await asyncio.gather(
+        *[get_host_processes(endpoint, cached) for endpoint in endpoints], return_exceptions=True)
+
+    processes = []
+    errors = {}
+    for endpoint, result in zip(endpoints, results):
+        if isinstance(result, asyncio.TimeoutError):
+            errors[endpoint] = f"{transport.get_endpoint_label(endpoint)}: timed out"
+        elif isinstance(result, Exception):
+            errors[endpoint] = f"{transport.get_endpoint_label(endpoint)}: {result}"
+        else:
+            processes.extend(result)
+
+    return processes, errors
+
+
+async def multicall(calls, endpoint=None):
+    return await exec_rpc("system.multicall", [
+        {"methodName": method_name, "params": list(params)}
+        for method_name, params in calls], endpoint=endpoint)
+
+
+async def advance_endpoint_tail_cursors(cursors, endpoint):
+    # the cursors are read together, and those that start over or have to
+    # be read a byte shorter read again together
+    while len(cursors) > 0:
+        results = await multicall([call for cursor in cursors
+                                   for call in supervisor.get_tail_cursor_calls(cursor)], endpoint)
+        cursors = [cursor for i, cursor in enumerate(cursors)
+                   if not supervisor.update_tail_cursor(cursor, results[2 * i:2 * i + 2])]
+
+
+async def advance_tail_cursors(cursors):
+    # one round trip per endpoint, and the endpoints at once
+    endpoint_cursors = {}
+    for cursor in cursors:
+        endpoint_cursors.setdefault(cursor["endpoint"], []).append(cursor)
+
+    await asyncio.gather(*[advance_endpoint_tail_cursors(cursors, endpoint)
+                           for endpoint, cursors in endpoint_cursors.items()])
+
+    return cursors
+
+
+async def subscribe_process_state_events(on_connect, on_event):
+    # reads the events forwarded by the bundled event listener until the
+    # connection drops
+    reader, writer = await asyncio.open_unix_connection(config.EVENTS_SOCK_PATH)
+    try:
+        on_connect()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+
+            on_event(json.loads(line.decode("utf-8")))
+    finally:
+        writer.close()
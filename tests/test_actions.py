@@ -0,0 +1,55 @@
+"""Jobs on the worker thread, and how they end when cancelled."""
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supervisor_shell_ui import actions  # noqa: E402
+
+
+class ActionsTest(unittest.TestCase):
+    def run_job(self, steps):
+        # returns the job once it's done
+        done = threading.Event()
+        job = actions.submit("Test", steps, lambda job: done.set())
+        self.assertTrue(done.wait(5))
+
+        return job
+
+    def test_failed_step(self):
+        def fail():
+            raise Exception("failed")
+
+        job = self.run_job([fail, lambda: "done"])
+        self.assertEqual(job["failed_steps"], 1)
+        self.assertEqual(job["output"], ["failed", "done"])
+        self.assertFalse(job["cancelled"])
+        self.assertEqual(actions.get_progress(), "Jobs: 1 of 1 done, 1 failed")
+
+    def test_step_stopped_by_cancel(self):
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        def run_until_cancelled():
+            started.set()
+            cancelled.wait(5)
+            if actions.is_cancel_requested():
+                raise actions.JobCancelled("Stopped after batch 1 of 2.")
+
+        job = actions.submit("Test", [run_until_cancelled, lambda: "not run"])
+        self.assertTrue(started.wait(5))
+        done = threading.Event()
+        job["on_done"] = lambda job: done.set()
+        actions.cancel_all()
+        cancelled.set()
+        self.assertTrue(done.wait(5))
+        self.assertTrue(job["cancelled"])
+        self.assertEqual(job["failed_steps"], 0)
+        self.assertEqual(job["output"], ["Stopped after batch 1 of 2."])
+        self.assertEqual(actions.get_progress(), "Jobs: 0 of 1 done, 1 cancelled")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Log exports against the fake supervisord, whose responses go through the
+same XML parsing as supervisord's: carriage returns come back as line
+feeds, so a chunk can decode shorter than the bytes of the log it covers.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+TOOLS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools")
+sys.path.insert(0, os.path.dirname(TOOLS_PATH))
+sys.path.insert(0, TOOLS_PATH)
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import config  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+from supervisor_shell_ui import transport  # noqa: E402
+
+NAME = "proc-00000"
+CHUNK_SIZE = 1000
+
+
+class ExportTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = fake_supervisord.FakeSupervisor(1)
+        cls.directory = tempfile.mkdtemp()
+        sock_path = os.path.join(cls.directory, "supervisor.sock")
+        fake_supervisord.start_unix_server(sock_path, cls.fake)
+        config.SUPERVISOR_SOCK_PATH = sock_path
+
+    @classmethod
+    def tearDownClass(cls):
+        transport.close()
+
+    def setUp(self):
+        self.chunk_size = config.LOG_EXPORT_CHUNK_SIZE
+        config.LOG_EXPORT_CHUNK_SIZE = CHUNK_SIZE
+        self.fake.truncate_log(NAME, supervisor.LOG_SOURCE_STDOUT)
+        self.path = os.path.join(self.directory, "export.log")
+
+    def tearDown(self):
+        config.LOG_EXPORT_CHUNK_SIZE = self.chunk_size
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def export(self, log):
+        self.fake.write_log(NAME, supervisor.LOG_SOURCE_STDOUT, log)
+        supervisor.export_process_log(NAME, supervisor.LOG_SOURCE_STDOUT, self.path)
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_crlf_log_has_no_duplicated_lines(self):
+        lines = [f"line {i} of the log".encode("utf-8") for i in range(2000)]
+        exported = self.export(b"\r\n".join(lines) + b"\r\n")
+        self.assertEqual(exported.split(b"\n")[:-1], lines)
+
+    def test_line_ends_across_chunks(self):
+        # LF, CRLF and lone CR line ends, and blank lines, at every offset
+        # from the end of a chunk
+        ends = [b"\n", b"\r\n", b"\r", b"\n\n", b"\r\n\r\n"]
+        log = b"".join(b"x" * (i % 7) + ends[i % len(ends)] for i in range(3000))
+        self.assertEqual(self.export(log), log.replace(b"\r\n", b"\n").replace(b"\r", b"\n"))
+
+    def test_chunks_end_on_whole_characters(self):
+        # the chunks would end in the middle of a character every other time
+        log = "é".encode("utf-8") * (3 * CHUNK_SIZE) + b"\n"
+        self.assertEqual(self.export(log), log)
+
+    def test_missing_process_fails_once(self):
+        calls = self.fake.calls
+        with self.assertRaises(Exception):
+            supervisor.read_process_log_chunk(
+                "proc-99999", supervisor.LOG_SOURCE_STDOUT, 0, CHUNK_SIZE)
+
+        self.assertEqual(self.fake.calls - calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
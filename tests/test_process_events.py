@@ -0,0 +1,66 @@
+"""Process records kept current from PROCESS_STATE events, checked against
+what supervisord's getProcessInfo would report for the same state.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supervisor_shell_ui import supervisor  # noqa: E402
+
+
+def get_process(state, pid):
+    return supervisor.parse_process_info({
+        "name": "web",
+        "group": "web",
+        "description": "",
+        "start": 0,
+        "stop": 0,
+        "now": 0,
+        "statename": state,
+        "spawnerr": "",
+        "exitstatus": 0,
+        "logfile": "",
+        "stdout_logfile": "",
+        "stderr_logfile": "",
+        "pid": pid,
+    })
+
+
+def get_event(state, pid=None):
+    event = {"groupname": "web", "processname": "web", "state": state}
+    if pid is not None:
+        event["pid"] = str(pid)
+
+    return event
+
+
+class ProcessStateEventTest(unittest.TestCase):
+    def test_running_takes_pid(self):
+        process = supervisor.apply_process_state_event(
+            get_process("STARTING", 0), get_event("RUNNING", 1234))
+        self.assertEqual(process["pid"], 1234)
+        self.assertEqual(process["description"], "pid 1234, uptime 0:00:00")
+
+    def test_exited_drops_pid(self):
+        # EXITED events carry the pid the process had
+        process = supervisor.apply_process_state_event(
+            get_process("RUNNING", 1234), get_event("EXITED", 1234))
+        self.assertEqual(process["state"], "EXITED")
+        self.assertEqual(process["pid"], 0)
+
+    def test_stopped_and_fatal_drop_pid(self):
+        for state in ["STOPPED", "FATAL", "BACKOFF"]:
+            process = supervisor.apply_process_state_event(
+                get_process("STOPPING", 1234), get_event(state, 1234))
+            self.assertEqual(process["pid"], 0, state)
+
+    def test_stopping_keeps_pid(self):
+        process = supervisor.apply_process_state_event(
+            get_process("RUNNING", 1234), get_event("STOPPING", 1234))
+        self.assertEqual(process["pid"], 1234)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Tail cursors read against the fake supervisord, whose tailProcessLog
+follows supervisord's tailFile: it returns the last bytes of the log
+whatever the offset asked for, so a cursor must only ever get what was
+logged past its offset from readProcessLog.
+"""
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+
+TOOLS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools")
+sys.path.insert(0, os.path.dirname(TOOLS_PATH))
+sys.path.insert(0, TOOLS_PATH)
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import config  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+from supervisor_shell_ui import supervisor_async  # noqa: E402
+from supervisor_shell_ui import transport  # noqa: E402
+
+NAME = "proc-00000"
+BYTE_COUNT = 1024
+
+
+class TailCursorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = fake_supervisord.FakeSupervisor(2)
+        sock_path = os.path.join(tempfile.mkdtemp(), "supervisor.sock")
+        fake_supervisord.start_unix_server(sock_path, cls.fake)
+        config.SUPERVISOR_SOCK_PATH = sock_path
+        cls.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(cls.loop)
+
+    @classmethod
+    def tearDownClass(cls):
+        transport.close_async()
+        cls.loop.close()
+
+    def setUp(self):
+        self.fake.truncate_log(NAME, supervisor.LOG_SOURCE_STDOUT)
+        self.log = b""
+
+    def write(self, data, name=NAME, log_source=supervisor.LOG_SOURCE_STDOUT):
+        self.fake.write_log(name, log_source, data)
+        if name == NAME and log_source == supervisor.LOG_SOURCE_STDOUT:
+            self.log += data
+
+    def advance(self, *cursors):
+        # returns the requests the read took
+        calls = self.fake.calls
+        self.loop.run_until_complete(supervisor_async.advance_tail_cursors(list(cursors)))
+
+        return self.fake.calls - calls
+
+    def get_cursor(self, name=NAME, log_source=supervisor.LOG_SOURCE_STDOUT):
+        return supervisor.get_tail_cursor(name, log_source, BYTE_COUNT)
+
+    def write_lines(self, count):
+        self.write(b"".join(f"line {i} of the log\n".encode("utf-8") for i in range(count)))
+
+    def test_first_read_takes_end_of_log(self):
+        self.write_lines(3000)
+        cursor = self.get_cursor()
+        self.assertEqual(self.advance(cursor), 1)
+        self.assertEqual(cursor["data"], self.log[-BYTE_COUNT:].decode("utf-8"))
+        self.assertEqual(cursor["offset"], len(self.log))
+        self.assertEqual(cursor["restarts"], 0)
+
+    def test_read_gets_only_new_bytes(self):
+        self.write_lines(3000)
+        cursor = self.get_cursor()
+        self.advance(cursor)
+        # tailFile would send the last BYTE_COUNT bytes again
+        self.assertNotEqual(self.fake.tail_process_log(
+            NAME, cursor["offset"] - 9, BYTE_COUNT, "stdout")[0], "new line\n")
+        self.write(b"new line\n")
+        self.assertEqual(self.advance(cursor), 1)
+        self.assertEqual(cursor["new_data"], "new line\n")
+        self.assertEqual(cursor["data"], self.log[-BYTE_COUNT:].decode("utf-8"))
+        self.assertEqual(cursor["offset"], len(self.log))
+        self.assertEqual(cursor["restarts"], 0)
+
+    def test_read_at_end_of_log_gets_nothing(self):
+        self.write_lines(10)
+        cursor = self.get_cursor()
+        self.advance(cursor)
+        data = cursor["data"]
+        self.advance(cursor)
+        self.assertEqual(cursor["new_data"], "")
+        self.assertEqual(cursor["data"], data)
+        self.assertEqual(cursor["restarts"], 0)
+
+    def test_overflow_starts_over_from_end_of_log(self):
+        self.write_lines(10)
+        cursor = self.get_cursor()
+        self.advance(cursor)
+        self.write_lines(3000)
+        self.assertEqual(self.advance(cursor), 2)
+        self.assertEqual(cursor["data"], self.log[-BYTE_COUNT:].decode("utf-8"))
+        self.assertEqual(cursor["offset"], len(self.log))
+        self.assertEqual(cursor["restarts"], 1)
+
+    def test_rotated_log_starts_over(self):
+        self.write_lines(100)
+        cursor = self.get_cursor()
+        self.advance(cursor)
+        self.fake.truncate_log(NAME, supervisor.LOG_SOURCE_STDOUT)
+        self.log = b""
+        self.write(b"after rotation\n")
+        self.assertEqual(self.advance(cursor), 2)
+        self.assertEqual(cursor["data"], "after rotation\n")
+        self.assertEqual(cursor["offset"], len(self.log))
+        self.assertEqual(cursor["restarts"], 1)
+
+    def test_first_read_starts_on_whole_character(self):
+        # the last BYTE_COUNT - 1 bytes start in the middle of a character
+        self.write("é".encode("utf-8") * BYTE_COUNT)
+        cursor = supervisor.get_tail_cursor(NAME, supervisor.LOG_SOURCE_STDOUT, BYTE_COUNT - 1)
+        self.assertEqual(self.advance(cursor), 2)
+        self.assertEqual(cursor["data"], "é" * (BYTE_COUNT // 2 - 1))
+        self.assertEqual(cursor["offset"], len(self.log))
+
+    def test_partly_logged_character_waits(self):
+        cursor = self.get_cursor()
+        self.advance(cursor)
+        self.write(b"caf\xc3")
+        self.advance(cursor)
+        self.assertEqual(cursor["new_data"], "")
+        self.write(b"\xa9\n")
+        self.advance(cursor)
+        self.assertEqual(cursor["new_data"], "café\n")
+        self.assertEqual(cursor["offset"], len(self.log))
+
+    def test_cursors_read_in_one_request(self):
+        cursors = [self.get_cursor(name, log_source)
+                   for name in [NAME, "proc-00001"]
+                   for log_source in [supervisor.LOG_SOURCE_STDOUT, supervisor.LOG_SOURCE_STDERR]]
+        self.advance(*cursors)
+        for cursor in cursors:
+            self.write(f"{cursor['name']} {cursor['log_source']}\n".encode("utf-8"),
+                       cursor["name"], cursor["log_source"])
+
+        self.assertEqual(self.advance(*cursors), 1)
+        for cursor in cursors:
+            self.assertEqual(cursor["new_data"], f"{cursor['name']} {cursor['log_source']}\n")
+
+    def test_missing_log_fails(self):
+        cursor = self.get_cursor("proc-99999")
+        with self.assertRaises(Exception):
+            self.advance(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark throughput and memory of exporting a process log to a file.
+
+Fills a log of the fake supervisord with a few megabytes of lines and
+exports it with supervisor.export_process_log, which reads it in chunks of
+LOG_EXPORT_CHUNK_SIZE bytes, plain and gzipped, and with a single
+readProcessStdoutLog call for the whole log, the way the log would be
+fetched without paging through it. Reports the throughput, and in a
+second run the peak memory traced while exporting, which includes what
+the fake supervisord in the same process takes to answer.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import config  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+from supervisor_shell_ui import transport  # noqa: E402
+
+NAME = "proc-00000"
+
+
+def export_in_one_read(path):
+    data = supervisor.exec_rpc(
+        supervisor.READ_LOG_RPC_METHODS[supervisor.LOG_SOURCE_STDOUT], NAME, 0, 0)
+    with open(path, "wb") as f:
+        f.write(data.encode("utf-8"))
+
+
+EXPORTS = {
+    "one read": export_in_one_read,
+    "chunked": lambda path: supervisor.export_process_log(
+        NAME, supervisor.LOG_SOURCE_STDOUT, path),
+    "chunked gz": lambda path: supervisor.export_process_log(
+        NAME, supervisor.LOG_SOURCE_STDOUT, path, compress=True),
+}
+
+
+def fill_log(fake, size):
+    fake.truncate_log(NAME, supervisor.LOG_SOURCE_STDOUT)
+    line_num = 0
+    lines = []
+    logged_size = 0
+    while logged_size < size:
+        line = f"{time.time():.6f} request {line_num} served in {line_num % 97} ms\n".encode("utf-8")
+        lines.append(line)
+        logged_size += len(line)
+        line_num += 1
+        if len(lines) == 10000:
+            fake.write_log(NAME, supervisor.LOG_SOURCE_STDOUT, b"".join(lines))
+            lines = []
+
+    fake.write_log(NAME, supervisor.LOG_SOURCE_STDOUT, b"".join(lines))
+
+    return logged_size
+
+
+def measure(export, path, traced):
+    # returns the seconds the export took and the peak memory traced
+    if traced:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    export(path)
+    elapsed_time = time.perf_counter() - start
+    peak_size = 0
+    if traced:
+        _, peak_size = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    os.remove(path)
+
+    return elapsed_time, peak_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="8,32", help="log sizes in MiB")
+    parser.add_argument("--chunk-size", type=int, default=config.LOG_EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fake = fake_supervisord.FakeSupervisor(1)
+    directory = tempfile.mkdtemp()
+    sock_path = os.path.join(directory, "supervisor.sock")
+    fake_supervisord.start_unix_server(sock_path, fake)
+    config.SUPERVISOR_SOCK_PATH = sock_path
+    config.LOG_EXPORT_CHUNK_SIZE = args.chunk_size
+    path = os.path.join(directory, "export.log")
+
+    print(f"{'log MiB':>8}{'export':>12}{'MiB/s':>10}{'peak MiB':>10}")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        logged_size = fill_log(fake, size * 1024 * 1024)
+        for label, export in EXPORTS.items():
+            elapsed_time, _ = measure(export, path, False)
+            _, peak_size = measure(export, path, True)
+            print(f"{size:>8}{label:>12}{logged_size / 1024 / 1024 / elapsed_time:>10.1f}"
+                  f"{peak_size / 1024 / 1024:>10.1f}")
+
+    transport.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Benchmark the CPU time the UI uses while nobody touches it.
+
+Runs a page in a pseudo terminal against the fake supervisord for a few
+seconds without pressing a key, and reports the CPU time it took and the
+bytes it sent to the terminal. The event-driven loop is compared with
+the old one, which looked for keys and drew a frame every 10 ms. Two
+pages are left alone: the process table, and the Tail page following a
+log that nothing is written to.
+"""
+import os
+import pty
+import sys
+import json
+import time
+import curses
+import fcntl
+import struct
+import asyncio
+import termios
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import config  # noqa: E402
+from supervisor_shell_ui import eventloop  # noqa: E402
+from supervisor_shell_ui import page  # noqa: E402
+from supervisor_shell_ui import page_main  # noqa: E402
+from supervisor_shell_ui import page_tail  # noqa: E402
+from supervisor_shell_ui import screen  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+
+ROWS = 40
+COLUMNS = 150
+
+
+def use_polling_loop():
+    # how pages waited between frames before the event-driven loop
+    async def wait_for_redraw():
+        await asyncio.sleep(0.01)
+
+    eventloop.wait_for_redraw = wait_for_redraw
+
+
+SESSIONS = {
+    "table": page_main.enter,
+    "tail": lambda: page_tail.enter([("proc-00000", supervisor.LOG_SOURCE_STDOUT, None)]),
+}
+
+
+async def stop_after(seconds):
+    await asyncio.sleep(seconds)
+    page.exit = True
+    eventloop.request_redraw()
+
+
+def play(stdscr, session, seconds, result_fd):
+    curses.curs_set(0)
+    stdscr.timeout(0)
+    screen.init(stdscr)
+
+    async def run():
+        eventloop.spawn(stop_after(seconds))
+        await SESSIONS[session]()
+
+    start = time.process_time()
+    eventloop.run(run())
+    os.write(result_fd, json.dumps(time.process_time() - start).encode("utf-8"))
+
+
+def run(sock_path, session, polling, seconds):
+    # returns the bytes written to the terminal and the CPU time
+    result_read_fd, result_write_fd = os.pipe()
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.close(result_read_fd)
+        fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack("HHHH", ROWS, COLUMNS, 0, 0))
+        os.environ["TERM"] = "xterm-256color"
+        config.SUPERVISOR_SOCK_PATH = sock_path
+        if polling:
+            use_polling_loop()
+
+        curses.wrapper(play, session, seconds, result_write_fd)
+        os._exit(0)
+
+    os.close(result_write_fd)
+    sent_bytes = 0
+    while True:
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            break
+
+        if not data:
+            break
+
+        sent_bytes += len(data)
+
+    os.waitpid(pid, 0)
+    result = os.read(result_read_fd, 65536)
+    os.close(result_read_fd)
+
+    return sent_bytes, json.loads(result.decode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--processes", type=int, default=100)
+    args = parser.parse_args()
+
+    fake = fake_supervisord.FakeSupervisor(args.processes)
+    fake.write_log("proc-00000", "stdout", b"nothing to see here\n")
+    sock_path = os.path.join(tempfile.mkdtemp(), "supervisor.sock")
+    fake_supervisord.start_unix_server(sock_path, fake)
+
+    print(f"{'page':>8}{'loop':>10}{'CPU %':>10}{'B/s':>10}")
+    for session in SESSIONS:
+        for polling in [True, False]:
+            sent_bytes, cpu_time = run(sock_path, session, polling, args.seconds)
+            print(f"{session:>8}{'polling' if polling else 'events':>10}"
+                  f"{cpu_time * 100 / args.seconds:>10.2f}"
+                  f"{sent_bytes / args.seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
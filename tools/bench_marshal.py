@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark getAllProcessInfo response parsing.
+
+Compares rpc.Decoder with the ElementTree walk that
+supervisor.parse_process_list_info did before it, on responses generated
+by the fake supervisord. Times are per 1,000 processes.
+"""
+import gc
+import os
+import sys
+import time
+import argparse
+import xml.etree.ElementTree as ET
+
+from xmlrpc.client import dumps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import rpc  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+from supervisor_shell_ui import transport  # noqa: E402
+
+
+def legacy_parse_process_info(struct_element):
+    process = {}
+    for member in struct_element.findall("member"):
+        name = member.find("name").text
+        value_type = list(member.find("value"))[0].tag
+        val = member.find(f"value/{value_type}").text
+        process[name] = int(val) if value_type == "int" else val
+
+    process["state"] = process["statename"]
+
+    return process
+
+
+def legacy_parse(raw_data):
+    root = ET.fromstring(raw_data)
+    return [legacy_parse_process_info(value)
+            for value in root.findall(".//array/data/value/struct")]
+
+
+def decoder_parse(raw_data):
+    # fed in the same chunks the transport reads off the socket
+    decoder = rpc.Decoder()
+    for i in range(0, len(raw_data), transport.READ_CHUNK_SIZE):
+        decoder.feed(raw_data[i:i + transport.READ_CHUNK_SIZE])
+
+    return supervisor.parse_process_list_info(decoder.close())
+
+
+def best_of(fn, raw_data, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        processes = fn(raw_data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'processes':>10}{'bytes':>12}{'legacy ms/1k':>15}"
+          f"{'decoder ms/1k':>16}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        fake = fake_supervisord.FakeSupervisor(size)
+        raw_data = dumps((fake.get_all_process_info(),),
+                         methodresponse=True).encode("utf-8")
+
+        legacy_time, legacy_processes = best_of(
+            legacy_parse, raw_data, args.repeat)
+        decoder_time, decoder_processes = best_of(
+            decoder_parse, raw_data, args.repeat)
+        if [p["name"] for p in legacy_processes] != \
+                [p["name"] for p in decoder_processes]:
+            raise Exception("parsers disagree")
+
+        print(f"{size:>10}{len(raw_data):>12}"
+              f"{legacy_time * 1e3 * 1000 / size:>15.2f}"
+              f"{decoder_time * 1e3 * 1000 / size:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark a follow poll of the Tail page showing several logs at once.
+
+Logs a line to each of a growing number of logs of the fake supervisord
+before every poll and times reading all of them, with each log read in a
+call of its own, one after the other, as separate Tail pages would, and
+with all of them read in one system.multicall. The fake supervisord takes
+--delay seconds to answer each request, standing in for the round trip to
+a remote host.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import config  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+from supervisor_shell_ui import supervisor_async  # noqa: E402
+from supervisor_shell_ui import transport  # noqa: E402
+
+LOG_SOURCES = [supervisor.LOG_SOURCE_STDOUT, supervisor.LOG_SOURCE_STDERR]
+
+
+async def advance_one_by_one(cursors):
+    for cursor in cursors:
+        await supervisor_async.advance_tail_cursors([cursor])
+
+
+async def time_polls(fake, cursors, advance, polls):
+    # returns the mean time of a poll and the requests it took
+    times = []
+    calls = fake.calls
+    for i in range(polls):
+        for cursor in cursors:
+            fake.write_log(cursor["name"], cursor["log_source"],
+                           f"poll {i} of {cursor['name']} {cursor['log_source']}\n".encode("utf-8"))
+
+        start = time.perf_counter()
+        await advance(cursors)
+        times.append(time.perf_counter() - start)
+
+    return sum(times) / len(times), (fake.calls - calls) / polls
+
+
+async def run(fake, counts, polls):
+    print(f"{'logs':>6}{'reads':>12}{'ms/poll':>10}{'requests':>10}")
+    for count in counts:
+        for advance, label in [(advance_one_by_one, "one by one"),
+                               (supervisor_async.advance_tail_cursors, "multicall")]:
+            cursors = [supervisor.get_tail_cursor(
+                f"proc-{i // 2:05d}", LOG_SOURCES[i % 2], 64 * 1024) for i in range(count)]
+            await advance(cursors)
+            mean_time, requests = await time_polls(fake, cursors, advance, polls)
+            print(f"{count:>6}{label:>12}{mean_time * 1e3:>10.2f}{requests:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--counts", default="1,2,4,8")
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.counts.split(",")]
+    fake = fake_supervisord.FakeSupervisor((max(counts) + 1) // 2, delay=args.delay)
+    sock_path = os.path.join(tempfile.mkdtemp(), "supervisor.sock")
+    fake_supervisord.start_unix_server(sock_path, fake)
+    config.SUPERVISOR_SOCK_PATH = sock_path
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(run(fake, counts, args.polls))
+    finally:
+        transport.close_async()
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Benchmark terminal traffic and frame time of the renderer.
+
+Runs the pages in a pseudo terminal and counts the bytes curses writes to
+it, comparing the back buffer renderer with drawing straight through
+curses, where every draw goes to the window and clearing the screen
+clears the terminal. Two sessions are played: moving the cursor through
+the process table while a process changes now and then, and following a
+log that is refreshed every few frames.
+"""
+import os
+import pty
+import sys
+import json
+import time
+import curses
+import fcntl
+import struct
+import termios
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import page_main  # noqa: E402
+from supervisor_shell_ui import page_tail  # noqa: E402
+from supervisor_shell_ui import screen  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+
+ROWS = 40
+COLUMNS = 150
+
+
+def use_direct_rendering():
+    # how the screen was drawn before the back buffer
+    def addstr(row, start_pos, label, highlight=False):
+        if highlight:
+            screen.stdscr.addstr(row, start_pos, label, curses.A_REVERSE)
+        else:
+            screen.stdscr.addstr(row, start_pos, label)
+
+    screen.addstr = addstr
+    screen.hline = lambda row, start_pos, length: screen.stdscr.hline(
+        row, start_pos, curses.ACS_HLINE, length)
+    screen.refresh = lambda: screen.stdscr.refresh()
+    screen.clear = lambda: screen.stdscr.clear()
+
+
+def play_table(frames):
+    fake = fake_supervisord.FakeSupervisor(300)
+    processes = supervisor.parse_process_list_info(fake.get_all_process_info())
+    page_main.init()
+    page_main.current_section = page_main.SECTION_PROCESS_TABLE
+    page_main.set_processes(supervisor.get_process_snapshot(processes))
+
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        page_main.handle_input_key_down()
+        if i % 20 == 0:
+            key = page_main.process_keys[i % len(processes)]
+            page_main.update_process(key, {"description": f"pid {i}, uptime 0:00:{i % 60:02d}"})
+
+        page_main.draw()
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def play_tail(frames):
+    page_tail.init()
+    page_tail.set_tails([("proc-00000", supervisor.LOG_SOURCE_STDOUT, None)])
+    pane = page_tail.panes[0]
+    cursor = page_tail.tail_cursors[0]
+
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        line = f"{time.time():.6f} request {i} served in {i % 97} ms\n"
+        restarts = cursor["restarts"]
+        size = (cursor["offset"] or 0) + len(line)
+        supervisor.update_tail_cursor(cursor, [["", size, False], line])
+        page_tail.update_log(pane, [restarts])
+        # a refresh of the page clears the screen
+        if i % 10 == 0:
+            screen.clear()
+
+        page_tail.draw()
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+SESSIONS = {
+    "table": play_table,
+    "tail": play_tail,
+}
+
+
+def play(stdscr, session, frames, result_fd):
+    curses.curs_set(0)
+    screen.init(stdscr)
+    times = SESSIONS[session](frames)
+    os.write(result_fd, json.dumps(times).encode("utf-8"))
+
+
+def run(session, direct, frames):
+    # returns the bytes written to the terminal and the frame times
+    result_read_fd, result_write_fd = os.pipe()
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.close(result_read_fd)
+        fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack("HHHH", ROWS, COLUMNS, 0, 0))
+        os.environ["TERM"] = "xterm-256color"
+        if direct:
+            use_direct_rendering()
+
+        curses.wrapper(play, session, frames, result_write_fd)
+        os._exit(0)
+
+    os.close(result_write_fd)
+    sent_bytes = 0
+    while True:
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            break
+
+        if not data:
+            break
+
+        sent_bytes += len(data)
+
+    os.waitpid(pid, 0)
+    result = b""
+    while True:
+        data = os.read(result_read_fd, 65536)
+        if not data:
+            break
+
+        result += data
+
+    os.close(result_read_fd)
+
+    return sent_bytes, json.loads(result.decode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'session':>8}{'renderer':>10}{'B/frame':>10}{'ms/frame':>10}")
+    for session in SESSIONS:
+        for direct in [True, False]:
+            sent_bytes, times = run(session, direct, args.frames)
+            print(f"{session:>8}{'direct' if direct else 'buffered':>10}"
+                  f"{sent_bytes / args.frames:>10.0f}"
+                  f"{sum(times) * 1e3 / len(times):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Benchmark key handling on the process table.
+
+Loads synthetic process lists of growing size into page_main and times
+each key press together with the draw that follows it, on a window that
+only records what is drawn. Latency that stays flat as the list grows
+means no key walks the whole table. Also reports the memory the process
+records take, and the time per key of typing a filter.
+"""
+import gc
+import os
+import sys
+import time
+import curses
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import keys  # noqa: E402
+from supervisor_shell_ui import page_main  # noqa: E402
+from supervisor_shell_ui import screen  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+
+KEYS = [
+    ("down", page_main.handle_input_key_down),
+    ("up", page_main.handle_input_key_up),
+    ("right", page_main.handle_input_key_right),
+    ("left", page_main.handle_input_key_left),
+    ("pgdn", page_main.handle_input_key_page_down),
+]
+
+
+class Window:
+    # stands in for the curses window, counting the calls that would draw
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.calls = 0
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addstr(self, *args):
+        self.calls += 1
+
+    def hline(self, *args):
+        self.calls += 1
+
+    def attron(self, *args):
+        pass
+
+    def attroff(self, *args):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+    def clear(self):
+        pass
+
+
+def load_processes(size, group_size):
+    fake = fake_supervisord.FakeSupervisor(size, group_size)
+    gc.collect()
+    tracemalloc.start()
+    # fresh structs, as the decoder would return them
+    processes = supervisor.parse_process_list_info(
+        [dict(info) for info in fake.get_all_process_info()])
+    page_main.set_processes(supervisor.get_process_snapshot(processes))
+    size_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size_bytes
+
+
+def time_key(handler, presses):
+    times = []
+    for _ in range(presses):
+        start = time.perf_counter()
+        handler()
+        page_main.draw()
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def time_filter(query, repeat):
+    # every key narrows the matches of the one before
+    times = []
+    for _ in range(repeat):
+        page_main.handle_input_key_slash()
+        for c in query:
+            start = time.perf_counter()
+            page_main.handle_process_filter_input(ord(c))
+            page_main.draw()
+            times.append(time.perf_counter() - start)
+
+        page_main.handle_process_filter_input(keys.ESCAPE)
+
+    return sum(times) / len(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--group-size", type=int, default=0)
+    parser.add_argument("--presses", type=int, default=2000)
+    parser.add_argument("--filter", default="proc-00042")
+    args = parser.parse_args()
+
+    # ACS_* only exist, and doupdate only works, once curses is initialized
+    if not hasattr(curses, "ACS_HLINE"):
+        curses.ACS_HLINE = ord("-")
+
+    curses.doupdate = lambda: None
+    screen.stdscr = Window(50, 160)
+    screen.height, screen.width = screen.stdscr.getmaxyx()
+    screen.reset_buffers()
+
+    print(f"{'processes':>10}{'KiB/1k':>10}" +
+          "".join(f"{name + ' us':>12}" for name, _ in KEYS) + f"{'max us':>10}" +
+          f"{'filter us':>12}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        page_main.init()
+        page_main.current_section = page_main.SECTION_PROCESS_TABLE
+        page_main.processes = []
+        page_main.process_table_rows = []
+        page_main.selected_process_index = 0
+        page_main.process_table_scroll_offset = 0
+        size_bytes = load_processes(size, args.group_size)
+        page_main.draw()
+
+        means = []
+        worst = 0
+        for _, handler in KEYS:
+            gc.collect()
+            times = time_key(handler, args.presses)
+            means.append(sum(times) / len(times))
+            worst = max([worst] + times)
+
+        filter_time = time_filter(args.filter, 10)
+        print(f"{size:>10}{size_bytes / 1024 * 1000 / size:>10.0f}" +
+              "".join(f"{mean * 1e6:>12.1f}" for mean in means) + f"{worst * 1e6:>10.0f}" +
+              f"{filter_time * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Benchmark frame time of the Tail page on large log windows.
+
+Fills the Tail page with a screenful of log on terminals of growing size
+and times the frames of following it, with a line arriving before each
+one, and of scrolling up through it a row at a time. The cached wrapping
+of only the lines that arrived is compared with wrapping the whole log
+on every frame, which is what the page did before. Drawing goes to a
+window that only records what is drawn. Then logs a few megabytes into
+the scrollback and reports the memory it takes as it fills up and starts
+dropping lines.
+"""
+import os
+import sys
+import time
+import random
+import curses
+import argparse
+import textwrap
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supervisor_shell_ui import config  # noqa: E402
+from supervisor_shell_ui import page_tail  # noqa: E402
+from supervisor_shell_ui import screen  # noqa: E402
+from supervisor_shell_ui import supervisor  # noqa: E402
+
+SIZES = [(50, 150), (100, 300), (200, 400)]
+WORDS = ["GET", "POST", "/api/v1/jobs", "200", "404", "worker", "done", "in",
+         "ms", "request", "retrying", "connection", "reset", "by", "peer"]
+
+
+class Window:
+    # stands in for the curses window
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addstr(self, *args):
+        pass
+
+    def hline(self, *args):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+
+def draw_whole_log():
+    # how the page drew the log before it was kept wrapped
+    pane = page_tail.panes[0]
+    formatted_output_lines = []
+    for line in page_tail.tail_cursors[0]["data"].split("\n"):
+        formatted_output_lines.extend(textwrap.wrap(line, screen.width - 1))
+
+    page_tail.visible_lines_num = screen.height - screen.current_draw_row_num - 2
+    pane["rows_num"] = len(formatted_output_lines)
+    end_index = max(0, pane["rows_num"] - pane["scroll_offset"])
+    start_index = max(0, end_index - page_tail.visible_lines_num)
+    lines = formatted_output_lines[start_index:end_index]
+    while len(lines) < page_tail.visible_lines_num:
+        lines.append("")
+
+    for line in lines:
+        screen.addstr(
+            screen.get_and_inc_current_draw_row_num(), 0, line.ljust(screen.width - 1))
+
+
+def get_log_line(rng, line_num):
+    # mostly short lines, and now and then one that wraps
+    words = [rng.choice(WORDS) for _ in range(rng.choice([6, 8, 10, 60]))]
+
+    return f"{line_num:08d} " + " ".join(words) + "\n"
+
+
+def load_log(height, width, rng):
+    screen.stdscr = Window(height, width)
+    screen.height, screen.width = height, width
+    screen.reset_buffers()
+    page_tail.init()
+    page_tail.set_tails([("proc-00000", supervisor.LOG_SOURCE_STDOUT, None)])
+    cursor = page_tail.tail_cursors[0]
+    line_num = 0
+    while len(cursor["data"]) < cursor["byte_count"]:
+        log_line(get_log_line(rng, line_num))
+        line_num += 1
+
+    return line_num
+
+
+def log_line(line):
+    cursor = page_tail.tail_cursors[0]
+    restarts = cursor["restarts"]
+    size = (cursor["offset"] or 0) + len(line)
+    supervisor.update_tail_cursor(cursor, [["", size, False], line])
+    page_tail.update_log(page_tail.panes[0], [restarts])
+
+
+def time_follow(frames, rng, line_num):
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        log_line(get_log_line(rng, line_num + i))
+        page_tail.draw()
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def time_scroll(frames):
+    page_tail.draw()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        page_tail.handle_input_key_up()
+        page_tail.draw()
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def measure_scrollback(logged_size, rng):
+    # memory of the scrollback after every tenth of logged_size
+    load_log(50, 150, rng)
+    page_tail.set_log(page_tail.panes[0], "")
+    logged_size_so_far = 0
+    tracemalloc.start()
+    sizes = []
+    line_num = 0
+    for i in range(10):
+        while logged_size_so_far < logged_size * (i + 1) / 10:
+            line = get_log_line(rng, line_num)
+            log_line(line)
+            logged_size_so_far += len(line)
+            line_num += 1
+
+        size, _ = tracemalloc.get_traced_memory()
+        sizes.append((logged_size_so_far, size, len(page_tail.panes[0]["lines"])))
+
+    tracemalloc.stop()
+
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--scrollback-size", type=int, default=1024 * 1024)
+    parser.add_argument("--logged-size", type=int, default=8 * 1024 * 1024)
+    args = parser.parse_args()
+
+    # ACS_* only exist, and doupdate only works, once curses is initialized
+    if not hasattr(curses, "ACS_HLINE"):
+        curses.ACS_HLINE = ord("-")
+
+    curses.doupdate = lambda: None
+    cached_draw_process_log = page_tail.draw_process_log
+
+    print(f"{'size':>9}{'log KiB':>9}{'wrapping':>10}{'follow ms':>11}{'scroll ms':>11}")
+    for height, width in SIZES:
+        for whole in [True, False]:
+            page_tail.draw_process_log = draw_whole_log if whole else cached_draw_process_log
+            rng = random.Random(0)
+            line_num = load_log(height, width, rng)
+            follow_times = time_follow(args.frames, rng, line_num)
+            scroll_times = time_scroll(args.frames)
+            print(f"{f'{width}x{height}':>9}{len(page_tail.tail_cursors[0]['data']) / 1024:>9.0f}"
+                  f"{'whole' if whole else 'cached':>10}"
+                  f"{sum(follow_times) * 1e3 / len(follow_times):>11.3f}"
+                  f"{sum(scroll_times) * 1e3 / len(scroll_times):>11.3f}")
+
+    page_tail.draw_process_log = cached_draw_process_log
+    config.TAIL_SCROLLBACK_SIZE = args.scrollback_size
+    print()
+    print(f"{'logged KiB':>11}{'memory KiB':>11}{'lines':>9}")
+    for logged_size, size, lines_num in measure_scrollback(args.logged_size, random.Random(0)):
+        print(f"{logged_size / 1024:>11.0f}{size / 1024:>11.0f}{lines_num:>9}")
+
+
+if __name__ == "__main__":
+    main()
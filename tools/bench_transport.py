@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark RPC latency of the keep-alive transport against the old path.
+
+The old path is what exec_rpc did before supervisor_shell_ui.transport:
+an AF_UNIX probe connect followed by a POST through a requests-unixsocket
+session. Runs against the bundled fake supervisord unless --sock is given.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import statistics
+
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_supervisord  # noqa: E402
+from supervisor_shell_ui import config  # noqa: E402
+from supervisor_shell_ui import transport  # noqa: E402
+
+BODY = """<?xml version="1.0"?>
+<methodCall>
+    <methodName>supervisor.getState</methodName>
+    <params>
+    </params>
+</methodCall>
+"""
+
+
+def legacy_post(session, sock_path, body):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(sock_path)
+    client.close()
+
+    url = f'http+unix://{quote(sock_path, safe="")}/RPC2'
+    resp = session.post(url, data=body)
+
+    return resp.status_code, resp.text
+
+
+def measure(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        status, _ = fn()
+        samples.append(time.perf_counter() - start)
+        if status != 200:
+            raise Exception(f"unexpected HTTP status {status}")
+
+    return samples
+
+
+def report(label, samples, connects):
+    if connects is None:
+        connects = "n/a"
+
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<12}{statistics.mean(samples) * 1e6:>10.1f}"
+          f"{samples[len(samples) // 2] * 1e6:>10.1f}{p95 * 1e6:>10.1f}"
+          f"{connects:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sock", help="benchmark a real supervisord socket")
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    server = None
+    sock_path = args.sock
+    if sock_path is None:
+        sock_path = os.path.join(tempfile.mkdtemp(), "supervisor.sock")
+        server = fake_supervisord.start_unix_server(
+            sock_path, fake_supervisord.FakeSupervisor())
+
+    config.SUPERVISOR_SOCK_PATH = sock_path
+
+    def count_connects(fn):
+        if server is None:
+            return fn(), None
+
+        before = server.connections
+        samples = fn()
+
+        return samples, server.connections - before
+
+    print(f"{args.calls} x supervisor.getState on {sock_path}")
+    print(f"{'path':<12}{'mean us':>10}{'p50 us':>10}{'p95 us':>10}"
+          f"{'connects':>10}")
+
+    try:
+        import requests_unixsocket
+    except ImportError:
+        print(f"{'legacy':<12}skipped, requests-unixsocket is not installed")
+    else:
+        session = requests_unixsocket.Session()
+        report("legacy", *count_connects(lambda: measure(
+            lambda: legacy_post(session, sock_path, BODY), args.calls)))
+        session.close()
+
+    report("keep-alive", *count_connects(lambda: measure(
+        lambda: transport.post(BODY), args.calls)))
+    transport.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Stand-in for supervisord's side of the event listener protocol.
+
+Runs supervisor_shell_ui.eventlistener as a child process and feeds it random
+PROCESS_STATE events for the process names that fake_supervisord.py uses, so
+the push channel can be exercised without a real supervisord.
+"""
+import sys
+import time
+import random
+import argparse
+import subprocess
+
+TRANSITIONS = {
+    "STOPPED": ["STARTING"],
+    "STARTING": ["RUNNING", "BACKOFF"],
+    "RUNNING": ["STOPPING", "EXITED"],
+    "BACKOFF": ["STARTING", "FATAL"],
+    "STOPPING": ["STOPPED"],
+    "EXITED": ["STARTING"],
+    "FATAL": ["STARTING"],
+}
+
+
+def send_event(listener, serial, eventname, payload):
+    ready = listener.stdout.readline()
+    if ready != b"READY\n":
+        raise Exception(f"unexpected listener output: {ready!r}")
+
+    payload = payload.encode("utf-8")
+    header = (f"ver:3.0 server:fake serial:{serial} pool:supervisor-shell-ui "
+              f"poolserial:{serial} eventname:{eventname} len:{len(payload)}\n")
+    listener.stdin.write(header.encode("utf-8") + payload)
+    listener.stdin.flush()
+
+    result = listener.stdout.readline()
+    body = listener.stdout.read(int(result.split()[1]))
+    if body != b"OK":
+        raise Exception(f"unexpected listener result: {result + body!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sock", default="/tmp/supervisor-shell-ui-events.sock")
+    parser.add_argument("--processes", type=int, default=50)
+    parser.add_argument("--group-size", type=int, default=0,
+                        help="put processes in groups of this size")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="events per second")
+    args = parser.parse_args()
+
+    listener = subprocess.Popen(
+        [sys.executable, "-m", "supervisor_shell_ui.eventlistener", args.sock],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    # everything starts out running, as in fake_supervisord.py
+    states = {i: "RUNNING" for i in range(args.processes)}
+    pid = 10000
+    serial = 0
+    try:
+        while True:
+            i = random.randrange(args.processes)
+            name = f"proc-{i:05d}"
+            group = f"pool-{i // args.group_size:04d}" if args.group_size else name
+            from_state = states[i]
+            states[i] = random.choice(TRANSITIONS[from_state])
+
+            payload = f"processname:{name} groupname:{group} from_state:{from_state}"
+            if states[i] in ["RUNNING", "STOPPING", "EXITED"]:
+                if states[i] == "RUNNING":
+                    pid += 1
+
+                payload += f" pid:{pid}"
+
+            send_event(listener, serial, f"PROCESS_STATE_{states[i]}", payload)
+            serial += 1
+            time.sleep(1 / args.rate)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.terminate()
+
+
+if __name__ == "__main__":
+    main()
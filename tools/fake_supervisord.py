@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""Stand-in for the supervisord XML-RPC endpoint.
+
+Serves a synthetic process table over a unix socket (and optionally a TCP
+port, like inet_http_server) so the RPC layer can be
+exercised and benchmarked without a real supervisord. Only the methods that
+supervisor-shell-ui calls are implemented, and they follow supervisord's
+semantics (namespecs, fault codes, tail offsets, unwrapped multicall results).
+"""
+import os
+import sys
+import base64
+import time
+import argparse
+import threading
+import socketserver
+
+from http.server import BaseHTTPRequestHandler
+from xmlrpc.client import Fault, dumps, loads
+
+UNKNOWN_METHOD = 1
+INCORRECT_PARAMETERS = 2
+BAD_ARGUMENTS = 3
+BAD_NAME = 10
+NO_FILE = 20
+FAILED = 30
+ALREADY_STARTED = 60
+NOT_RUNNING = 70
+
+STATE_CODES = {
+    "STOPPED": 0,
+    "STARTING": 10,
+    "RUNNING": 20,
+    "BACKOFF": 30,
+    "STOPPING": 40,
+    "EXITED": 100,
+    "FATAL": 200,
+    "UNKNOWN": 1000,
+}
+
+RUNNING_STATES = ["RUNNING", "STARTING", "BACKOFF"]
+
+
+class FakeSupervisor:
+    def __init__(self, process_count=10, group_size=0, delay=0.0, startsecs=0.0):
+        self.lock = threading.Lock()
+        self.delay = delay
+        # started processes stay STARTING this long, like with supervisord's
+        # startsecs; calls return right away either way, as with wait=False
+        self.startsecs = startsecs
+        self.calls = 0
+        self.next_pid = 1000 + process_count
+        self.processes = {}
+        self.logs = {}
+
+        now = int(time.time())
+        for i in range(process_count):
+            name = f"proc-{i:05d}"
+            group = f"pool-{i // group_size:04d}" if group_size else name
+            self.processes[f"{group}:{name}"] = {
+                "name": name,
+                "group": group,
+                "start": now,
+                "stop": 0,
+                "now": now,
+                "state": STATE_CODES["RUNNING"],
+                "statename": "RUNNING",
+                "spawnerr": "",
+                "exitstatus": 0,
+                "logfile": f"/var/log/{name}.log",
+                "stdout_logfile": f"/var/log/{name}.log",
+                "stderr_logfile": f"/var/log/{name}.err",
+                "pid": 1000 + i,
+                "description": f"pid {1000 + i}, uptime 0:00:00",
+            }
+            self.logs[(f"{group}:{name}", "stdout")] = bytearray(
+                f"{name} started\n".encode("utf-8"))
+            self.logs[(f"{group}:{name}", "stderr")] = bytearray()
+
+        self.methods = {
+            "supervisor.getState": self.get_state,
+            "supervisor.getAllProcessInfo": self.get_all_process_info,
+            "supervisor.getProcessInfo": self.get_process_info,
+            "supervisor.startProcess": self.start_process,
+            "supervisor.stopProcess": self.stop_process,
+            "supervisor.startAllProcesses": self.start_all_processes,
+            "supervisor.stopAllProcesses": self.stop_all_processes,
+            "supervisor.startProcessGroup": self.start_process_group,
+            "supervisor.stopProcessGroup": self.stop_process_group,
+            "supervisor.clearProcessLogs": self.clear_process_logs,
+            "supervisor.tailProcessStdoutLog": lambda name, offset, length:
+                self.tail_process_log(name, offset, length, "stdout"),
+            "supervisor.tailProcessStderrLog": lambda name, offset, length:
+                self.tail_process_log(name, offset, length, "stderr"),
+            "supervisor.readProcessStdoutLog": lambda name, offset, length:
+                self.read_process_log(name, offset, length, "stdout"),
+            "supervisor.readProcessStderrLog": lambda name, offset, length:
+                self.read_process_log(name, offset, length, "stderr"),
+        }
+
+    def dispatch(self, body):
+        if self.delay:
+            time.sleep(self.delay)
+
+        params, method = loads(body)
+        try:
+            with self.lock:
+                self.calls += 1
+                if method == "system.multicall":
+                    result = self.multicall(*params)
+                else:
+                    result = self.call(method, params)
+
+            return dumps((result,), methodresponse=True)
+        except Fault as fault:
+            return dumps(fault, methodresponse=True)
+
+    def call(self, method, params):
+        if method not in self.methods:
+            raise Fault(UNKNOWN_METHOD, "UNKNOWN_METHOD")
+
+        try:
+            return self.methods[method](*params)
+        except TypeError:
+            raise Fault(INCORRECT_PARAMETERS, "INCORRECT_PARAMETERS")
+
+    def multicall(self, calls):
+        # like supervisord, successful results are returned as-is and not
+        # wrapped in single-item arrays
+        results = []
+        for call in calls:
+            try:
+                results.append(self.call(call["methodName"], call["params"]))
+            except Fault as fault:
+                results.append({
+                    "faultCode": fault.faultCode,
+                    "faultString": fault.faultString,
+                })
+
+        return results
+
+    def find(self, namespec):
+        if ":" not in namespec:
+            namespec = f"{namespec}:{namespec}"
+
+        if namespec not in self.processes:
+            raise Fault(BAD_NAME, f"BAD_NAME: {namespec}")
+
+        return namespec
+
+    def find_group(self, group):
+        namespecs = [namespec for namespec, process in self.processes.items()
+                     if process["group"] == group]
+        if not namespecs:
+            raise Fault(BAD_NAME, f"BAD_NAME: {group}")
+
+        return namespecs
+
+    def set_state(self, namespec, statename):
+        process = self.processes[namespec]
+        now = int(time.time())
+        process["state"] = STATE_CODES[statename]
+        process["statename"] = statename
+        process["now"] = now
+        if statename == "RUNNING":
+            process["start"] = now
+            process["pid"] = self.next_pid
+            self.next_pid += 1
+            process["description"] = f"pid {process['pid']}, uptime 0:00:00"
+        elif statename in ["STOPPED", "EXITED", "FATAL"]:
+            process["stop"] = now
+            process["pid"] = 0
+            process["description"] = time.strftime("%b %d %I:%M %p")
+
+    def start(self, namespec):
+        if not self.startsecs:
+            self.set_state(namespec, "RUNNING")
+            return
+
+        self.set_state(namespec, "STARTING")
+        timer = threading.Timer(self.startsecs, self.finish_start, (namespec,))
+        timer.daemon = True
+        timer.start()
+
+    def finish_start(self, namespec):
+        with self.lock:
+            if self.processes[namespec]["statename"] == "STARTING":
+                self.set_state(namespec, "RUNNING")
+
+    def status(self, namespec, description="OK"):
+        process = self.processes[namespec]
+        return {
+            "name": process["name"],
+            "group": process["group"],
+            "status": 80,
+            "description": description,
+        }
+
+    def write_log(self, namespec, channel, data):
+        with self.lock:
+            self.logs[self.find(namespec), channel] += data
+
+    def truncate_log(self, namespec, channel):
+        with self.lock:
+            self.logs[self.find(namespec), channel] = bytearray()
+
+    def get_state(self):
+        return {"statecode": 1, "statename": "RUNNING"}
+
+    def get_all_process_info(self):
+        return list(self.processes.values())
+
+    def get_process_info(self, name):
+        return self.processes[self.find(name)]
+
+    def start_process(self, name, wait=True):
+        namespec = self.find(name)
+        if self.processes[namespec]["statename"] in RUNNING_STATES:
+            raise Fault(ALREADY_STARTED, f"ALREADY_STARTED: {name}")
+
+        self.start(namespec)
+
+        return True
+
+    def stop_process(self, name, wait=True):
+        namespec = self.find(name)
+        if self.processes[namespec]["statename"] not in RUNNING_STATES:
+            raise Fault(NOT_RUNNING, f"NOT_RUNNING: {name}")
+
+        self.set_state(namespec, "STOPPED")
+
+        return True
+
+    def start_all_processes(self, wait=True):
+        results = []
+        for namespec, process in self.processes.items():
+            if process["statename"] not in RUNNING_STATES:
+                self.start(namespec)
+                results.append(self.status(namespec))
+
+        return results
+
+    def stop_all_processes(self, wait=True):
+        results = []
+        for namespec, process in self.processes.items():
+            if process["statename"] in RUNNING_STATES:
+                self.set_state(namespec, "STOPPED")
+                results.append(self.status(namespec))
+
+        return results
+
+    def start_process_group(self, name, wait=True):
+        results = []
+        for namespec in self.find_group(name):
+            if self.processes[namespec]["statename"] not in RUNNING_STATES:
+                self.start(namespec)
+                results.append(self.status(namespec))
+
+        return results
+
+    def stop_process_group(self, name, wait=True):
+        results = []
+        for namespec in self.find_group(name):
+            if self.processes[namespec]["statename"] in RUNNING_STATES:
+                self.set_state(namespec, "STOPPED")
+                results.append(self.status(namespec))
+
+        return results
+
+    def clear_process_logs(self, name):
+        namespec = self.find(name)
+        self.logs[namespec, "stdout"] = bytearray()
+        self.logs[namespec, "stderr"] = bytearray()
+
+        return True
+
+    def tail_process_log(self, name, offset, length, channel):
+        # same arithmetic as supervisor.options.tailFile
+        log = self.logs[self.find(name), channel]
+        offset, length = int(offset), int(length)
+        overflow = False
+        size = len(log)
+
+        if size > offset + length:
+            overflow = True
+            offset = size - 1
+
+        if offset + length > size:
+            if offset > size - 1:
+                length = 0
+            offset = size - length
+
+        offset = max(offset, 0)
+        length = max(length, 0)
+        data = bytes(log[offset:offset + length]) if length else b""
+
+        return [data.decode("utf-8", "replace"), size, overflow]
+
+    def read_process_log(self, name, offset, length, channel):
+        log = self.logs[self.find(name), channel]
+        offset, length = int(offset), int(length)
+        if offset < 0:
+            if length:
+                raise Fault(BAD_ARGUMENTS, "BAD_ARGUMENTS")
+            data = log[max(0, len(log) + offset):]
+        elif length < 0:
+            raise Fault(BAD_ARGUMENTS, "BAD_ARGUMENTS")
+        elif length == 0:
+            data = log[offset:]
+        else:
+            data = log[offset:offset + length]
+
+        try:
+            return bytes(data).decode("utf-8")
+        except UnicodeDecodeError as e:
+            # supervisord fails the read when it cuts a character in two
+            raise Fault(FAILED, f"FAILED: {e}")
+
+
+class RPCHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def handle(self):
+        self.server.connections += 1
+        super().handle()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.is_authorized():
+            # what supervisord's inet_http_server answers
+            response = b"Unauthorized"
+            self.send_response(401)
+            self.send_header("WWW-Authenticate", 'Basic realm="default"')
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+            return
+
+        response = self.server.supervisor.dispatch(body).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def is_authorized(self):
+        credentials = getattr(self.server, "credentials", None)
+        if credentials is None:
+            return True
+
+        expected = "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+
+        return self.headers.get("Authorization") == expected
+
+    def address_string(self):
+        return "fake-supervisord"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixRPCServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, sock_path, supervisor):
+        self.supervisor = supervisor
+        self.connections = 0
+        super().__init__(sock_path, RPCHandler)
+
+
+class TCPRPCServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, supervisor):
+        self.supervisor = supervisor
+        self.connections = 0
+        super().__init__(address, RPCHandler)
+
+
+def serve_in_thread(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server
+
+
+def start_unix_server(sock_path, supervisor):
+    if os.path.exists(sock_path):
+        os.unlink(sock_path)
+
+    return serve_in_thread(UnixRPCServer(sock_path, supervisor))
+
+
+def start_tcp_server(port, supervisor, credentials=None):
+    # credentials are "username:password", checked like inet_http_server does
+    server = TCPRPCServer(("127.0.0.1", port), supervisor)
+    server.credentials = credentials
+
+    return serve_in_thread(server)
+
+
+def write_logs_forever(supervisor, namespec, rate):
+    line_num = 0
+    while True:
+        time.sleep(1 / rate)
+        line_num += 1
+        supervisor.write_log(
+            namespec, "stdout", f"{time.time():.3f} line {line_num}\n".encode("utf-8"))
+        if line_num % 10 == 0:
+            supervisor.write_log(
+                namespec, "stderr", f"warning at line {line_num}\n".encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sock", default="/tmp/fake-supervisor.sock")
+    parser.add_argument("--port", type=int, default=0,
+                        help="also serve on this TCP port of 127.0.0.1")
+    parser.add_argument("--username", default="",
+                        help="require HTTP basic auth on the TCP port")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--processes", type=int, default=50)
+    parser.add_argument("--group-size", type=int, default=0,
+                        help="put processes in groups of this size")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="seconds to sleep before answering each request")
+    parser.add_argument("--startsecs", type=float, default=0.0,
+                        help="seconds that started processes stay STARTING")
+    parser.add_argument("--log-rate", type=float, default=0.0,
+                        help="lines per second logged by the first process")
+    args = parser.parse_args()
+
+    supervisor = FakeSupervisor(
+        args.processes, args.group_size, args.delay, args.startsecs)
+    start_unix_server(args.sock, supervisor)
+    if args.port:
+        credentials = None
+        if args.username:
+            credentials = f"{args.username}:{args.password}"
+
+        start_tcp_server(args.port, supervisor, credentials)
+    if args.log_rate:
+        namespec = next(iter(supervisor.processes))
+        threading.Thread(target=write_logs_forever, daemon=True,
+                         args=(supervisor, namespec, args.log_rate)).start()
+
+    print(f"fake supervisord listening on {args.sock}", file=sys.stderr)
+    if args.port:
+        print(f"fake supervisord listening on http://127.0.0.1:{args.port}",
+              file=sys.stderr)
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()